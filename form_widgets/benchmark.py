@@ -0,0 +1,390 @@
+"""Data-scaling micro-benchmarks for the form_widgets read/write paths.
+
+Generates synthetic tables matching the real CSV schemas, then calls every
+GET/POST handler in-process through the ASGI app (no network) and records
+ops/s, latency and peak Python memory per operation.
+
+    python benchmark.py                                # 1k, 100k and 1M rows
+    python benchmark.py --sizes 1000 100000 --backend sqlite
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+
+Each size runs in a fresh subprocess so module state and memory figures do
+not leak between sizes.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlencode
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = Path(__file__).parent.resolve()
+
+# ==================== Synthetic Data ====================
+SECTORS = ["Real Estate", "Public Finance"]
+PRODUCTS = ["Term Loan", "Tax-Exempt Term Loan", "Bond", "Revenue Bond"]
+SOURCES = ["Broker", "Sponsor", "SFS Internal Referral", "Agent"]
+STAGES = [f"DI{i}" for i in range(1, 10)]
+FACILITY_TYPES = ["Senior Debt", "Mezzanine", "Equipment Lease", "Working Capital", "Bond Issue"]
+TAX_STATUSES = ["Tax-Exempt", "Taxable", "AMT"]
+RATE_TYPES = ["Fixed", "Floating", "Capped Floater"]
+PROPERTY_TYPES = ["Office", "Retail", "Industrial", "Multifamily", "Hospitality"]
+ACCOUNT_TYPES = ["Sponsor", "Broker", "Agent", "Lender", "Legal", "Municipality"]
+RELATIONSHIPS = ["Active", "Prospective", "Preferred", "Inactive"]
+CITIES = ["New York NY", "Boston MA", "Chicago IL", "Austin TX", "Denver CO", "Seattle WA", "Miami FL"]
+WORDS = ["capital", "realty", "partners", "municipal", "housing", "infrastructure", "healthcare",
+         "office", "multifamily", "development", "finance", "bonds", "holdings", "group", "trust",
+         "urban", "harbor", "summit", "gateway", "riverside", "metro", "atlantic", "pacific"]
+FIRST_NAMES = ["Jonathan", "Maria", "David", "Priya", "Michael", "Elena", "Robert", "Aisha", "Kevin", "Sarah"]
+LAST_NAMES = ["Gray", "Lopez", "Chen", "Patel", "Kingston", "Rossi", "Nguyen", "Okafor", "Walsh", "Cohen"]
+
+
+def day(rng):
+    return f"{rng.randint(2020, 2035)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def phrase(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def deal_row(rng, i):
+    return {
+        "opportunity_name": f"{phrase(rng, 2).title()} {i}",
+        "sector": rng.choice(SECTORS),
+        "product": rng.choice(PRODUCTS),
+        "source": rng.choice(SOURCES),
+        "stage": rng.choice(STAGES),
+        "takedown_date": day(rng),
+        "description": phrase(rng, 10),
+    }
+
+
+def tranche_row(rng, i):
+    principal = rng.randint(5, 500) * 1_000_000
+    spread = rng.choice([0, 125, 185, 250, 325])
+    return {
+        "tranche_name": f"Series {rng.randint(2020, 2030)}{chr(65 + i % 26)}-{i}",
+        "facility_type": rng.choice(FACILITY_TYPES),
+        "tax_status": rng.choice(TAX_STATUSES),
+        "use_of_proceeds": rng.choice(["New Construction", "Acquisition", "Refinancing", "Renovation"]),
+        "original_principal": str(principal),
+        "current_balance": str(int(principal * rng.uniform(0.4, 1.0))),
+        "unfunded_commitment": str(rng.choice([0, principal // 4])),
+        "rate_type": rng.choice(RATE_TYPES),
+        "base_index": rng.choice(["SOFR", "", "BSBY"]),
+        "spread_bps": str(spread),
+        "floor_cap": rng.choice(["0.50%", "N/A", "6.00% cap"]),
+        "all_in_rate": f"{rng.uniform(2, 9):.2f}%",
+        "day_count": rng.choice(["Actual/360", "30/360", "Actual/365"]),
+        "origination_date": day(rng),
+        "maturity_date": day(rng),
+        "amortization_type": rng.choice(["IO-to-Amort", "Interest Only", "Fully Amortizing"]),
+        "io_period_months": str(rng.choice([0, 12, 24, 36, 60])),
+        "extension_options": rng.choice(["None", "Two 1-year options", "One 6-month option"]),
+        "lien_position": rng.choice(["1st Lien", "2nd Lien", "Parity"]),
+        "ltv_ltc_limit": f"{rng.randint(50, 85)}%",
+        "dscr_covenant": f"{rng.uniform(1.05, 1.5):.2f}x",
+        "recourse": rng.choice(["Non-Recourse", "Full Recourse", "Limited/Burn-off"]),
+    }
+
+
+def asset_row(rng, i):
+    return {
+        "property_name": f"{phrase(rng, 2).title()} {i}",
+        "property_address": f"{rng.randint(1, 999)} {rng.choice(WORDS).title()} Street {rng.choice(CITIES)}",
+        "property_type": rng.choice(PROPERTY_TYPES),
+        "square_footage": str(rng.randint(20, 900) * 1000),
+        "market_value": f"${rng.randint(10, 900) * 1_000_000}",
+        "occupancy_rate": f"{rng.randint(60, 100)}%",
+        "acquisition_date": day(rng),
+        "asset_notes": phrase(rng, 12),
+    }
+
+
+def account_row(rng, i):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "account_name": f"{phrase(rng, 2).title()} {i}",
+        "account_type": rng.choice(ACCOUNT_TYPES),
+        "primary_contact": f"{first} {last}",
+        "contact_email": f"{first[0].lower()}{last.lower()}{i}@example.com",
+        "contact_phone": f"212-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        "business_focus": phrase(rng, 6),
+        "relationship_status": rng.choice(RELATIONSHIPS),
+        "account_notes": phrase(rng, 20),
+    }
+
+
+GENERATORS = {
+    "sfs_pipeline_log.csv": deal_row,
+    "tranches_log.csv": tranche_row,
+    "realestate_assets.csv": asset_row,
+    "involved_accounts.csv": account_row,
+}
+
+
+def generate(data_dir: Path, rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    for filename, make_row in GENERATORS.items():
+        with open(data_dir / filename, mode="w", newline="", encoding="utf-8") as file:
+            writer = None
+            for i in range(rows):
+                row = make_row(rng, i)
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+
+
+# ==================== In-process ASGI client ====================
+async def call(app, method: str, path: str, params: dict = None, body: bytes = b"", headers: dict = None):
+    """Sends one request straight into the ASGI app; returns (status, body size, headers)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 80),
+    }
+    sent = False
+    response = {"status": None, "size": 0, "headers": {}}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["size"], response["headers"]
+
+
+# ==================== Measurement ====================
+def operations(rows: int):
+    """(name, method, path, params, body factory, headers) for every measured call"""
+    counter = iter(range(10 ** 9))
+    json_body = lambda row: lambda: json.dumps(row).encode()
+    deal = {"opportunity_name": "Bench Deal", "sector": "Real Estate", "product": "Bond", "stage": "DI1"}
+    tranche = {"tranche_name": "Bench Tranche", "facility_type": "Mezzanine", "current_balance": "1000000"}
+    asset = {"property_name": "Bench Tower", "property_type": "Office", "market_value": "$1000000"}
+    account = {"account_name": "Bench Capital", "account_type": "Broker", "relationship_status": "Active"}
+    bulk_rows = min(rows, 10000)
+    bulk_body = lambda: "\n".join(json.dumps({**deal, "opportunity_name": f"Bulk {next(counter)}"})
+                                  for _ in range(bulk_rows)).encode()
+    page = {"offset": rows // 2, "limit": 100}
+    return [
+        ("GET deals", "GET", "/salesforce/deals", {}, None, None),
+        ("GET deals page", "GET", "/salesforce/deals", page, None, None),
+        ("GET deals sorted page", "GET", "/salesforce/deals", {**page, "sort_by": "takedown_date"}, None, None),
+        ("GET deals stream ndjson", "GET", "/salesforce/deals", {"stream": "ndjson"}, None, None),
+        ("GET deals pipeline", "GET", "/salesforce/deals/pipeline", {}, None, None),
+        ("GET tranches", "GET", "/salesforce/tranches", {}, None, None),
+        ("GET tranches projected page", "GET", "/salesforce/tranches",
+         {**page, "columns": "tranche_name,current_balance,all_in_rate"}, None, None),
+        ("GET tranches summary", "GET", "/salesforce/tranches/summary", {}, None, None),
+        ("GET realestate", "GET", "/salesforce/realestate", {}, None, None),
+        ("GET accounts", "GET", "/salesforce/accounts", {}, None, None),
+        ("GET accounts list", "GET", "/salesforce/accounts/list", {}, None, None),
+        ("GET accounts list prefix", "GET", "/salesforce/accounts/list", {"q": "cap"}, None, None),
+        ("GET lookup all", "GET", "/salesforce/accounts/lookup", {}, None, None),
+        ("GET lookup short term", "GET", "/salesforce/accounts/lookup", {"search_term": "ca"}, None, None),
+        ("GET lookup word", "GET", "/salesforce/accounts/lookup", {"search_term": "harbor"}, None, None),
+        ("GET lookup phrase", "GET", "/salesforce/accounts/lookup", {"search_term": "urban trust"}, None, None),
+        ("GET lookup miss", "GET", "/salesforce/accounts/lookup", {"search_term": "zzzz"}, None, None),
+        ("GET lookup type filter", "GET", "/salesforce/accounts/lookup", {"account_type_filter": "Broker"}, None, None),
+        ("GET lookup both filters", "GET", "/salesforce/accounts/lookup",
+         {"account_type_filter": "Lender", "relationship_filter": "Preferred"}, None, None),
+        ("GET lookup term + filters limit 50", "GET", "/salesforce/accounts/lookup",
+         {"search_term": "capital", "account_type_filter": "Sponsor", "relationship_filter": "Active", "limit": 50},
+         None, None),
+        ("POST deal", "POST", "/salesforce/deals", {}, json_body(deal), {"content-type": "application/json"}),
+        ("POST tranche", "POST", "/salesforce/tranches", {}, json_body(tranche), {"content-type": "application/json"}),
+        ("POST asset", "POST", "/salesforce/realestate", {}, json_body(asset), {"content-type": "application/json"}),
+        ("POST account", "POST", "/salesforce/accounts", {}, json_body(account), {"content-type": "application/json"}),
+        (f"POST deals bulk {bulk_rows} rows", "POST", "/salesforce/deals/bulk", {}, bulk_body,
+         {"content-type": "application/x-ndjson"}),
+    ]
+
+
+async def measure(app, op, budget: float, max_iterations: int) -> dict:
+    name, method, path, params, body, headers = op
+    make_body = body or (lambda: b"")
+
+    # Warm-up call (also verifies the endpoint works)
+    status, size, _ = await call(app, method, path, params, make_body(), headers)
+
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_iterations and time.perf_counter() - started < budget:
+        payload = make_body()
+        t0 = time.perf_counter()
+        await call(app, method, path, params, payload, headers)
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+
+    payload = make_body()
+    tracemalloc.start()
+    await call(app, method, path, params, payload, headers)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "op": name,
+        "status": status,
+        "response_bytes": size,
+        "iterations": len(timings),
+        "ops_per_sec": round(len(timings) / sum(timings), 2) if timings else None,
+        "mean_ms": round(1000 * sum(timings) / len(timings), 3) if timings else None,
+        "p50_ms": round(1000 * timings[len(timings) // 2], 3) if timings else None,
+        "p95_ms": round(1000 * timings[int(len(timings) * 0.95)], 3) if timings else None,
+        "peak_alloc_kib": round(peak / 1024, 1),
+    }
+
+
+async def run_size(rows: int, budget: float, max_iterations: int) -> dict:
+    import main
+
+    # Keep the synthetic schemas honest as tables gain columns
+    for table, spec in main.TABLES.items():
+        with open(spec["file"], newline="", encoding="utf-8") as file:
+            header = next(csv.reader(file))
+        if header != spec["columns"]:
+            raise SystemExit(f"Synthetic {table} columns do not match main.TABLES: {header}")
+
+    results = []
+    # First read of each table after start-up pays the full parse
+    for name, path in [("cold GET deals", "/salesforce/deals"), ("cold GET tranches", "/salesforce/tranches"),
+                       ("cold GET realestate", "/salesforce/realestate"),
+                       ("cold GET lookup (index build)", "/salesforce/accounts/lookup")]:
+        t0 = time.perf_counter()
+        status, size, headers = await call(main.app, "GET", path, {"limit": 1} if "lookup" not in path else {})
+        results.append({"op": name, "status": status, "seconds": round(time.perf_counter() - t0, 4)})
+
+    # Revalidation that the client's copy is current
+    _, _, headers = await call(main.app, "GET", "/salesforce/deals")
+    etag_op = ("GET deals 304", "GET", "/salesforce/deals", {}, None, {"if-none-match": headers.get("etag", "")})
+
+    for op in operations(rows)[:1] + [etag_op] + operations(rows)[1:]:
+        results.append(await measure(main.app, op, budget, max_iterations))
+        print(f"  {rows:>9} rows  {results[-1]['op']:<40} {results[-1].get('ops_per_sec')} ops/s", file=sys.stderr)
+
+    max_rss_kib = None
+    if resource is not None:
+        max_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            max_rss_kib //= 1024
+    return {"rows": rows, "max_rss_kib": max_rss_kib, "results": results}
+
+
+def worker(args):
+    """Runs one size in this process and prints its results as JSON"""
+    with tempfile.TemporaryDirectory(prefix="form_widgets_bench_") as data_dir:
+        t0 = time.perf_counter()
+        generate(Path(data_dir), args.worker)
+        generated = time.perf_counter() - t0
+        os.environ["FORM_WIDGETS_DATA_DIR"] = data_dir
+        os.environ["FORM_WIDGETS_STORAGE"] = args.backend
+        sys.path.insert(0, str(HERE))
+        if args.backend == "sqlite":
+            import main
+            main.import_csvs(main.STORAGE)
+        result = asyncio.run(run_size(args.worker, args.budget, args.max_iterations))
+        result["generate_seconds"] = round(generated, 2)
+    print(json.dumps(result))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current: dict, baseline_path: str):
+    """Prints ops/s ratios against an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    before = {(size["rows"], r["op"]): r.get("ops_per_sec")
+              for size in baseline["sizes"] for r in size["results"]}
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    for size in current["sizes"]:
+        for r in size["results"]:
+            old, new = before.get((size["rows"], r["op"])), r.get("ops_per_sec")
+            if old and new:
+                print(f"  {size['rows']:>9} rows  {r['op']:<40} {new / old:6.2f}x  ({old} -> {new} ops/s)")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000], help="Rows per table")
+    parser.add_argument("--backend", choices=["csv", "sqlite"], default="csv")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds spent timing each operation")
+    parser.add_argument("--max-iterations", type=int, default=1000, help="Upper bound on timed calls per operation")
+    parser.add_argument("--output", default=str(HERE / "benchmark_results.json"), help="Results file (JSON)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "sizes": [],
+    }
+    for rows in args.sizes:
+        print(f"Benchmarking {rows} rows per table ({args.backend})...", file=sys.stderr)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", str(rows), "--backend", args.backend,
+             "--budget", str(args.budget), "--max-iterations", str(args.max_iterations)],
+            stdout=subprocess.PIPE, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"  {rows} rows failed (exit code {proc.returncode})", file=sys.stderr)
+            continue
+        report["sizes"].append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main_cli()
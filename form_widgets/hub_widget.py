@@ -1,5 +1,6 @@
 # --- Widget 4: All-in-One Combined Widget ---
-@register_widget({
+# Widget config for /salesforce/hub; main.py serves the endpoint
+register_widget({
     "name": "📊 Salesforce Hub - All Forms",
     "description": "Combined widget with Deal Entry, Tranche Participation, and Real Estate Asset forms.",
     "type": "table",
@@ -154,33 +155,4 @@
             ]
         }
     ]
-})
-@app.get("/salesforce/hub")
-async def get_hub_data():
-    """Returns combined data from all three sources"""
-    # Get deals
-    deals = []
-    if CSV_FILE.exists():
-        with open(CSV_FILE, mode='r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                row['_type'] = 'deal'
-                deals.append(row)
-    
-    # Get tranches
-    if TRANCHE_FILE.exists():
-        with open(TRANCHE_FILE, mode='r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                row['_type'] = 'tranche'
-                deals.append(row)
-    
-    # Get real estate
-    if ASSET_FILE.exists():
-        with open(ASSET_FILE, mode='r', newline='') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                row['_type'] = 'asset'
-                deals.append(row)
-    
-    return deals if deals else [{"_type": "No data yet"}]
+})(get_hub_data)
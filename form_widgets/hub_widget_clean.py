@@ -1,7 +1,8 @@
 # This is the corrected hub widget with 3 forms as clickable buttons
 # Add this to main.py after removing the corrupted hub section
 
-@register_widget({
+# Widget config for /salesforce/hub; main.py serves the endpoint
+register_widget({
     "name": "📊 Salesforce Hub",
     "description": "All-in-one: Deal Entry, Tranche Participation, and Real Estate tracking with clickable form buttons.",
     "type": "table",
@@ -140,24 +141,4 @@
             ]
         }
     ]
-})
-@app.get("/salesforce/hub")
-async def get_hub_data():
-    """Returns combined data from all three sources"""
-    deals = []
-    if CSV_FILE.exists():
-        with open(CSV_FILE, mode='r', newline='') as file:
-            for row in csv.DictReader(file):
-                row['_type'] = 'deal'
-                deals.append(row)
-    if TRANCHE_FILE.exists():
-        with open(TRANCHE_FILE, mode='r', newline='') as file:
-            for row in csv.DictReader(file):
-                row['_type'] = 'tranche'
-                deals.append(row)
-    if ASSET_FILE.exists():
-        with open(ASSET_FILE, mode='r', newline='') as file:
-            for row in csv.DictReader(file):
-                row['_type'] = 'asset'
-                deals.append(row)
-    return deals if deals else [{"_type": "No data yet"}]
+})(get_hub_data)
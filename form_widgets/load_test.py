@@ -0,0 +1,294 @@
+"""HTTP load test for the form_widgets and sharepoint_widget servers.
+
+Launches both apps with uvicorn (form_widgets on a scratch copy of its CSVs,
+so submits never touch the real logs) and replays an OpenBB Workspace-like
+mix of traffic from concurrent virtual users: config polling, table
+refreshes, lookup keystrokes, form submits and document fetches. Reports
+p50/p95/p99 latency, throughput and error rate per endpoint.
+
+    python load_test.py                         # 20 users for 30 seconds
+    python load_test.py --users 100 --duration 60 --workers 4
+    python load_test.py --no-launch --form-url http://localhost:8008 --sharepoint-url http://localhost:8003
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+HERE = Path(__file__).parent.resolve()
+SHAREPOINT_DIR = HERE.parent / "sharepoint_widget"
+CSV_FILES = ["sfs_pipeline_log.csv", "tranches_log.csv", "realestate_assets.csv", "involved_accounts.csv"]
+
+# ==================== Traffic Mix ====================
+# Relative weight of each user action
+SCENARIOS = {
+    "config_poll": 10,
+    "table_refresh": 30,
+    "lookup_typing": 25,
+    "form_submit": 5,
+    "browse_documents": 10,
+    "fetch_document": 20,
+}
+
+LOOKUP_WORDS = ["capital", "realty", "partners", "municipal", "harbor", "sponsor", "broker", "gray"]
+LOOKUP_TYPES = ["", "", "Sponsor", "Broker", "Agent", "Lender"]
+LOOKUP_STATUSES = ["", "", "Active", "Prospective", "Preferred"]
+
+
+class Stats:
+    """Thread-safe latency and error samples per endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self.lock:
+            self.samples[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, elapsed: float) -> list:
+        rows = []
+        with self.lock:
+            for endpoint, samples in sorted(self.samples.items()):
+                samples = sorted(samples)
+                pct = lambda p: round(1000 * samples[min(len(samples) - 1, int(len(samples) * p))], 2)
+                rows.append({
+                    "endpoint": endpoint,
+                    "requests": len(samples),
+                    "errors": self.errors[endpoint],
+                    "error_rate": round(self.errors[endpoint] / len(samples), 4),
+                    "rps": round(len(samples) / elapsed, 2),
+                    "mean_ms": round(1000 * sum(samples) / len(samples), 2),
+                    "p50_ms": pct(0.50),
+                    "p95_ms": pct(0.95),
+                    "p99_ms": pct(0.99),
+                    "max_ms": round(1000 * samples[-1], 2),
+                })
+        return rows
+
+
+class VirtualUser(threading.Thread):
+    """One Workspace session: a keep-alive connection plus an ETag cache, like a browser"""
+
+    def __init__(self, index: int, args, stats: Stats, documents: list, stop: threading.Event):
+        super().__init__(name=f"user-{index}", daemon=True)
+        self.args = args
+        self.stats = stats
+        self.documents = documents
+        self.stop = stop
+        self.rng = random.Random(args.seed + index)
+        self.session = requests.Session()
+        self.etags = {}
+        self.folders = []
+
+    def request(self, method: str, base: str, path: str, label: str = None, **kwargs):
+        if label is None:
+            label = f"sharepoint{path}" if base == self.args.sharepoint_url else path
+        label = f"{method} {label}"
+        url = base + path
+        headers = {}
+        cache_key = (url, json.dumps(kwargs.get("params"), sort_keys=True))
+        if method == "GET" and cache_key in self.etags:
+            headers["If-None-Match"] = self.etags[cache_key]
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, timeout=self.args.timeout, **kwargs)
+            response.content
+        except requests.RequestException:
+            self.stats.record(label, time.perf_counter() - started, False)
+            return None
+        self.stats.record(label, time.perf_counter() - started, response.status_code < 400)
+        if method == "GET" and "ETag" in response.headers:
+            self.etags[cache_key] = response.headers["ETag"]
+        return response
+
+    # --- Scenarios ---
+    def config_poll(self):
+        for path in ("/widgets.json", "/apps.json"):
+            self.request("GET", self.args.form_url, path, f"form{path}")
+            self.request("GET", self.args.sharepoint_url, path, f"sharepoint{path}")
+
+    def table_refresh(self):
+        path = self.rng.choice(["/salesforce/deals", "/salesforce/tranches", "/salesforce/realestate", "/salesforce/accounts"])
+        self.request("GET", self.args.form_url, path)
+        if path == "/salesforce/tranches":
+            self.request("GET", self.args.form_url, "/salesforce/tranches/summary")
+        elif path == "/salesforce/deals":
+            self.request("GET", self.args.form_url, "/salesforce/deals/pipeline")
+
+    def lookup_typing(self):
+        word = self.rng.choice(LOOKUP_WORDS)
+        filters = {
+            "account_type_filter": self.rng.choice(LOOKUP_TYPES),
+            "relationship_filter": self.rng.choice(LOOKUP_STATUSES),
+        }
+        # One request per keystroke, as the search box fires on input
+        for i in range(1, len(word) + 1):
+            self.request("GET", self.args.form_url, "/salesforce/accounts/lookup", params={"search_term": word[:i], **filters})
+            time.sleep(self.args.keystroke_delay)
+        self.request("GET", self.args.form_url, "/salesforce/accounts/list", params={"q": word[:3]})
+
+    def form_submit(self):
+        n = self.rng.randint(0, 10 ** 6)
+        form, payload = self.rng.choice([
+            ("deals", {"opportunity_name": f"Load Test Deal {n}", "sector": "Real Estate", "product": "Term Loan",
+                       "source": "Broker", "stage": "DI1", "takedown_date": "2026-01-15"}),
+            ("tranches", {"tranche_name": f"Load Test Tranche {n}", "facility_type": "Senior Debt",
+                          "tax_status": "Taxable", "current_balance": "1000000", "rate_type": "Fixed"}),
+            ("realestate", {"property_name": f"Load Test Tower {n}", "property_type": "Office",
+                            "square_footage": "250000", "market_value": "$85000000"}),
+            ("accounts", {"account_name": f"Load Test Capital {n}", "account_type": "Broker",
+                          "relationship_status": "Active"}),
+        ])
+        self.request("POST", self.args.form_url, f"/salesforce/{form}", json=payload)
+        # The widget refreshes right after a submit
+        self.request("GET", self.args.form_url, f"/salesforce/{form}")
+
+    def browse_documents(self):
+        self.request("GET", self.args.sharepoint_url, "/deals")
+        response = self.request("GET", self.args.sharepoint_url, "/folders")
+        if response is not None and response.status_code == 200:
+            self.folders = [f["value"] for f in response.json()]
+        if self.folders:
+            picked = self.rng.sample(self.folders, self.rng.randint(1, len(self.folders)))
+            self.request("GET", self.args.sharepoint_url, "/files_list", params={"folder_ids": ",".join(picked)})
+
+    def fetch_document(self):
+        if self.documents:
+            self.request("GET", self.args.sharepoint_url, "/documents", params={"filename": self.rng.choice(self.documents)})
+
+    def run(self):
+        names, weights = zip(*SCENARIOS.items())
+        while not self.stop.is_set():
+            getattr(self, self.rng.choices(names, weights)[0])()
+            if self.args.think_time:
+                time.sleep(self.rng.uniform(0, 2 * self.args.think_time))
+
+
+# ==================== Servers ====================
+def launch(name: str, cwd: Path, port: int, workers: int, env: dict) -> subprocess.Popen:
+    print(f"Starting {name} on port {port}...", file=sys.stderr)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=cwd, env={**os.environ, **env}, stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise SystemExit(f"Server for {url} exited with code {proc.returncode}")
+        try:
+            requests.get(url + "/apps.json", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not come up within {timeout}s")
+
+
+def discover_documents(sharepoint_url: str) -> list:
+    folders = requests.get(sharepoint_url + "/folders", timeout=10).json()
+    files = requests.get(sharepoint_url + "/files_list",
+                         params={"folder_ids": ",".join(f["value"] for f in folders)}, timeout=10).json()
+    return [f["value"] for f in files]
+
+
+def print_report(rows: list, elapsed: float):
+    total = sum(r["requests"] for r in rows)
+    errors = sum(r["errors"] for r in rows)
+    header = f"{'endpoint':<42}{'reqs':>8}{'err%':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['endpoint']:<42}{r['requests']:>8}{100 * r['error_rate']:>7.2f}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+    print("-" * len(header))
+    print(f"{'total':<42}{total:>8}{100 * errors / max(total, 1):>7.2f}{total / elapsed:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between user actions (seconds)")
+    parser.add_argument("--keystroke-delay", type=float, default=0.05, help="Pause between lookup keystrokes (seconds)")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout (seconds)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes per launched app")
+    parser.add_argument("--form-port", type=int, default=8008)
+    parser.add_argument("--sharepoint-port", type=int, default=8003)
+    parser.add_argument("--no-launch", action="store_true", help="Target servers that are already running")
+    parser.add_argument("--form-url", help="Base URL of form_widgets (implies nothing is launched for it)")
+    parser.add_argument("--sharepoint-url", help="Base URL of sharepoint_widget (implies nothing is launched for it)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    procs = []
+    scratch = None
+    try:
+        if not args.form_url:
+            args.form_url = f"http://127.0.0.1:{args.form_port}"
+            if not args.no_launch:
+                scratch = tempfile.mkdtemp(prefix="form_widgets_load_")
+                for name in CSV_FILES:
+                    if (HERE / name).exists():
+                        shutil.copy(HERE / name, scratch)
+                procs.append((args.form_url, launch("form_widgets", HERE, args.form_port, args.workers,
+                                                    {"FORM_WIDGETS_DATA_DIR": scratch})))
+        if not args.sharepoint_url:
+            args.sharepoint_url = f"http://127.0.0.1:{args.sharepoint_port}"
+            if not args.no_launch:
+                procs.append((args.sharepoint_url, launch("sharepoint_widget", SHAREPOINT_DIR,
+                                                          args.sharepoint_port, args.workers, {})))
+        for url, proc in procs:
+            wait_ready(url, proc)
+        wait_ready(args.form_url, None)
+        wait_ready(args.sharepoint_url, None)
+
+        documents = discover_documents(args.sharepoint_url)
+        stats = Stats()
+        stop = threading.Event()
+        users = [VirtualUser(i, args, stats, documents, stop) for i in range(args.users)]
+
+        print(f"Running {args.users} users for {args.duration}s against {args.form_url} and {args.sharepoint_url}",
+              file=sys.stderr)
+        started = time.perf_counter()
+        for user in users:
+            user.start()
+        time.sleep(args.duration)
+        stop.set()
+        for user in users:
+            user.join(args.timeout)
+        elapsed = time.perf_counter() - started
+
+        rows = stats.report(elapsed)
+        print_report(rows, elapsed)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                json.dump({"users": args.users, "duration": elapsed, "workers": args.workers,
+                           "endpoints": rows}, file, indent=2)
+    finally:
+        for _, proc in procs:
+            proc.terminate()
+            proc.wait(10)
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
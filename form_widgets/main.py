@@ -1,15 +1,34 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Query, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Literal, List, Optional
-from datetime import date
+from datetime import date, datetime
+import codecs
 import csv
+import io
 import os
 from pathlib import Path
 import json
-from functools import wraps
+from functools import wraps, lru_cache
+from abc import ABC, abstractmethod
+from operator import itemgetter
 import asyncio
+import math
+import time
+import numpy as np
+import threading
+import sqlite3
+import re
+import heapq
+import bisect
+import itertools
+import sys
+
+# widget_common.py sits in the repo root, next to this app's folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from widget_common import (IOExecutor, Metrics, MetricsMiddleware, Profiler, ProfilerMiddleware, profile_router,
+                           make_etag, not_modified, EncodedJSON, EncodedJSONFile)
 
 app = FastAPI(title="Salesforce Widget Backend")
 
@@ -28,10 +47,214 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ==================== I/O Executor ====================
+# Blocking file reads, writes and encoding run here, off the event loop.
+# Size it per deployment with FORM_WIDGETS_IO_WORKERS.
+IO = IOExecutor(int(os.environ.get("FORM_WIDGETS_IO_WORKERS", "8")), thread_name_prefix="form-widgets-io")
+
+@app.get("/io/stats")
+async def get_io_stats():
+    """Queue depth of the I/O thread pool"""
+    return IO.stats()
+
+# ==================== Metrics ====================
+METRICS = Metrics()
+
+app.add_middleware(MetricsMiddleware, metrics=METRICS)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request and internal-operation metrics in Prometheus text format"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ==================== Profiling ====================
+# Configured by the FORM_WIDGETS_PROFILE_* variables, see Profiler
+PROFILER = Profiler("FORM_WIDGETS", Path(__file__).parent.resolve() / "profiles", IO)
+
+if PROFILER.enabled:
+    app.add_middleware(ProfilerMiddleware, profiler=PROFILER)
+
+app.include_router(profile_router(PROFILER))
+
+# ==================== Schemas ====================
+def encode_value(value) -> str:
+    """Stores a value the way csv.DictWriter writes it"""
+    return "" if value is None else str(value)
+
+def encode_date(value) -> str:
+    """Stores dates as YYYY-MM-DD, cutting ISO timestamps such as 2026-03-04T00:00:00.000Z to the date"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = encode_value(value)
+    try:
+        return date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        # Not a date; stored as submitted
+        return text
+
+# Form input type -> function coercing a submitted value for storage
+FIELD_ENCODERS = {"text": encode_value, "date": encode_date}
+
+class Categories:
+    """Small integer codes for the values of a column with a fixed option list.
+
+    Codes are assigned to the widget's options up front and to any other
+    value the first time it is seen, so values typed into the CSV by hand
+    still round-trip. Code 0 stands for a missing value (None). Each
+    value is held once, however many rows use it.
+    """
+
+    def __init__(self, options):
+        self.values = [None]
+        self.codes = {None: 0}
+        self.lock = threading.Lock()
+        for value in options:
+            self.code(value)
+
+    def code(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            with self.lock:
+                code = self.codes.get(value)
+                if code is None:
+                    # Publish the value before its code, readers decode without the lock
+                    self.values.append(value)
+                    code = self.codes[value] = len(self.values) - 1
+        return code
+
+class Schema:
+    """Columns of one table and its row codecs.
+
+    Rows are kept as plain tuples in column order, a fraction of the
+    memory of a dict per row. Columns whose form field has options hold
+    Categories codes instead of strings. encode() turns a submitted form
+    into such a tuple, coercing each field by its input type. decoder()
+    and writer_for() map between row tuples and CSV records whose header
+    orders the columns differently, and to_dicts() decodes rows for
+    responses. The codecs are built once per column order from
+    itemgetters and kept.
+    """
+
+    def __init__(self, table: str, fields: list):
+        self.table = table
+        self.fields = fields
+        self.columns = [field["paramName"] for field in fields]
+        self.index = {column: i for i, column in enumerate(self.columns)}
+        self.categories = {}
+        for field in fields:
+            if "options" in field:
+                column = field["paramName"]
+                self.categories[column] = Categories(option["value"] for option in field["options"])
+        # Shown by the table widgets while the table is empty
+        self.placeholder = dict.fromkeys(self.columns)
+        self.projections = {}
+        self.getters = {}
+        self.writers = {}
+        self.encoders = [self._encoder(field["paramName"], FIELD_ENCODERS.get(field.get("type", "text"), encode_value))
+                         for field in fields]
+        self.encode = self._encode
+
+    def _encoder(self, column: str, encode):
+        code = self.categories[column].code if column in self.categories else None
+        if code is None:
+            return lambda get: encode(get(column))
+        return lambda get: code(encode(get(column)))
+
+    def _reader(self, positions: list):
+        """Function returning the decoded values at positions of a row tuple"""
+        if len(positions) == 1:
+            pick = lambda row, p=positions[0]: (row[p],)
+        else:
+            pick = itemgetter(*positions)
+        decoded = [(j, self.categories[self.columns[p]].values) for j, p in enumerate(positions)
+                   if p < len(self.columns) and self.columns[p] in self.categories]
+        if not decoded:
+            return pick
+
+        def read(row):
+            values = list(pick(row))
+            for j, names in decoded:
+                values[j] = names[values[j]]
+            return values
+        return read
+
+    def _encode(self, row: dict) -> tuple:
+        get = row.get
+        return tuple([encode(get) for encode in self.encoders])
+
+    def decoder(self, header: list):
+        """Function turning a raw CSV record with this header into a row tuple"""
+        n = len(header)
+        # Columns missing from the header read the blank appended after the record
+        positions = [header.index(c) if c in header else n for c in self.columns]
+        width = max(positions) + 1
+        pick = itemgetter(*positions)
+        coded = [(i, self.categories[c].code) for i, c in enumerate(self.columns) if c in self.categories]
+
+        def decode(values):
+            if len(values) < width:
+                values = [*values, *[""] * (width - len(values))]
+            if not coded:
+                return pick(values)
+            row = list(pick(values))
+            for i, code in coded:
+                row[i] = code(row[i])
+            return tuple(row)
+        return decode
+
+    def writer_for(self, header: list):
+        """Function turning a row tuple into a CSV record in the order of header"""
+        key = tuple(header)
+        writer = self.writers.get(key)
+        if writer is None:
+            if list(header) == self.columns and not self.categories:
+                writer = lambda row: row
+            elif all(c in self.index for c in header):
+                writer = self._reader([self.index[c] for c in header])
+            else:
+                # Header columns the schema lacks read a blank appended to the row
+                read = self._reader([self.index.get(c, len(self.columns)) for c in header])
+                writer = lambda row: read(row + ("",))
+            self.writers[key] = writer
+        return writer
+
+    def value(self, column: str):
+        """Function returning the value of column in a row tuple"""
+        getter = self.getters.get(column)
+        if getter is None:
+            read = self._reader([self.index[column]])
+            getter = self.getters[column] = lambda row: read(row)[0]
+        return getter
+
+    def projection(self, columns: Optional[list] = None):
+        """Function turning a row tuple into a JSON-ready dict of columns (default all)"""
+        key = tuple(columns or self.columns)
+        to_dict = self.projections.get(key)
+        if to_dict is None:
+            read = self._reader([self.index[c] for c in key])
+            to_dict = self.projections[key] = lambda row: dict(zip(key, read(row)))
+        return to_dict
+
+    def to_dicts(self, rows, columns: Optional[list] = None) -> list:
+        """Row tuples as JSON-ready dicts, optionally projected to columns"""
+        return list(map(self.projection(columns), rows))
+
+SCHEMAS = {}
+
 # Widget Registry
 WIDGETS = {}
 
-def register_widget(widget_config):
+def register_widget(widget_config, table: Optional[str] = None):
+    """Adds the widget to widgets.json. With table, the fields of the
+    widget's form (less buttons and lookups) become that table's schema."""
+    if table:
+        form = next(p for p in widget_config["params"] if p.get("type") == "form")
+        fields = [p for p in form["inputParams"] if p.get("type") not in ("button", "endpoint")]
+        SCHEMAS[table] = Schema(table, fields)
+        TABLES[table]["columns"] = SCHEMAS[table].columns
+
     def decorator(func):
         @wraps(func)
         async def async_wrapper(*args, **kwargs):
@@ -53,22 +276,525 @@ def register_widget(widget_config):
         return sync_wrapper
     return decorator
 
+@lru_cache(maxsize=1)
+def widgets_payload() -> EncodedJSON:
+    # The registry is complete once the module has been imported
+    return EncodedJSON(WIDGETS, make_etag(json.dumps(WIDGETS, sort_keys=True)))
+
 @app.get("/widgets.json")
-def get_widgets():
-    return WIDGETS
+async def get_widgets(request: Request, response: Response):
+    return widgets_payload().respond(request, response)
+
+APPS_FILE = Path(__file__).parent.resolve() / "apps.json"
+APPS_PAYLOAD = EncodedJSONFile(APPS_FILE)
 
 @app.get("/apps.json")
-async def get_apps():
+async def get_apps(request: Request, response: Response):
     """Apps configuration file for the OpenBB Workspace"""
-    return JSONResponse(
-        content=json.load((Path(__file__).parent.resolve() / "apps.json").open())
-    )
+    payload = await IO.run(APPS_PAYLOAD.get)
+    return payload.respond(request, response)
+
+# Data files live next to this module unless FORM_WIDGETS_DATA_DIR points elsewhere
+DATA_DIR = Path(os.environ.get("FORM_WIDGETS_DATA_DIR", Path(__file__).parent.resolve()))
 
 # CSV Files
-CSV_FILE = Path(__file__).parent.resolve() / "sfs_pipeline_log.csv"
-TRANCHE_FILE = Path(__file__).parent.resolve() / "tranches_log.csv"
-ASSET_FILE = Path(__file__).parent.resolve() / "realestate_assets.csv"
-ACCOUNTS_FILE = Path(__file__).parent.resolve() / "involved_accounts.csv"
+CSV_FILE = DATA_DIR / "sfs_pipeline_log.csv"
+TRANCHE_FILE = DATA_DIR / "tranches_log.csv"
+ASSET_FILE = DATA_DIR / "realestate_assets.csv"
+ACCOUNTS_FILE = DATA_DIR / "involved_accounts.csv"
+
+# SQLite database used when FORM_WIDGETS_STORAGE=sqlite
+DB_FILE = Path(os.environ.get("FORM_WIDGETS_DB", DATA_DIR / "form_widgets.db"))
+
+# ==================== Storage ====================
+# The CSV file backing each table and the columns indexed by SQLite. "columns"
+# is filled in from the table's widget form when the widget is registered.
+TABLES = {
+    "deals": {"file": CSV_FILE, "indexes": ["stage", "sector", "takedown_date"]},
+    "tranches": {"file": TRANCHE_FILE, "indexes": ["facility_type", "origination_date", "maturity_date"]},
+    "assets": {"file": ASSET_FILE, "indexes": ["property_type", "acquisition_date"]},
+    "accounts": {"file": ACCOUNTS_FILE, "indexes": ["account_type", "relationship_status"]},
+}
+
+class CsvStorage:
+    """Append-only CSV file per table. Kept as the default for dev."""
+
+    def signature(self, table: str):
+        try:
+            st = os.stat(TABLES[table]["file"])
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def last_modified(self, table: str) -> Optional[float]:
+        try:
+            return os.stat(TABLES[table]["file"]).st_mtime
+        except FileNotFoundError:
+            return None
+
+    @METRICS.timed("csv_parse")
+    def load(self, table: str) -> list:
+        path = TABLES[table]["file"]
+        if not path.exists():
+            return []
+        with open(path, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            decode = SCHEMAS[table].decoder(next(reader, None) or SCHEMAS[table].columns)
+            return [decode(values) for values in reader if values]
+
+    def iter_chunks(self, table: str, size: int):
+        """Yields the rows in lists of up to size, reading the file lazily"""
+        path = TABLES[table]["file"]
+        if not path.exists():
+            return
+        with open(path, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            decode = SCHEMAS[table].decoder(next(reader, None) or SCHEMAS[table].columns)
+            while True:
+                records = list(itertools.islice(reader, size))
+                if not records:
+                    return
+                rows = [decode(values) for values in records if values]
+                if rows:
+                    yield rows
+
+    def append(self, table: str, rows: list):
+        """Appends row tuples with a single write and fsync.
+
+        Returns (signature before, signature after, rows as stored).
+        """
+        path = TABLES[table]["file"]
+        flags = os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        fieldnames = TABLES[table]["columns"]
+        before = self.signature(table)
+        header = before is None
+        if header:
+            try:
+                # O_EXCL: only one first writer gets to emit the header
+                fd = os.open(path, flags | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                header = False
+                before = self.signature(table)
+        if not header:
+            # Write in the column order of the existing header
+            with open(path, mode='r', newline='', encoding='utf-8') as file:
+                fieldnames = next(csv.reader(file), None) or fieldnames
+            fd = os.open(path, flags)
+
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if header:
+                writer.writerow(fieldnames)
+            writer.writerows(map(SCHEMAS[table].writer_for(fieldnames), rows))
+            # One O_APPEND write per batch keeps rows from interleaving
+            data = memoryview(buffer.getvalue().encode('utf-8'))
+            while data:
+                data = data[os.write(fd, data):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return before, self.signature(table), rows
+
+class SqliteStorage:
+    """SQLite database in WAL mode with one table per widget.
+
+    Readers never block the writer, and each append is a single
+    transaction. Connections are per thread.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.local = threading.local()
+        self.created = False
+        self.create_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL makes every commit durable; group commit amortizes the fsync
+            conn.execute("PRAGMA synchronous=FULL")
+            self.local.conn = conn
+        if not self.created:
+            # Deferred to first use, once the widgets have registered the columns
+            with self.create_lock:
+                if not self.created:
+                    self._create_tables(conn)
+                    self.created = True
+        return conn
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        for table, spec in TABLES.items():
+            columns = ", ".join(f'"{c}" TEXT NOT NULL DEFAULT \'\'' for c in spec["columns"])
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+            for column in spec["indexes"]:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" ON "{table}" ("{column}")')
+
+    def signature(self, table: str):
+        # Tables are append-only, so the highest rowid identifies the contents
+        return self.connect().execute(f'SELECT max(rowid) FROM "{table}"').fetchone()[0]
+
+    def last_modified(self, table: str) -> Optional[float]:
+        # Commits land in the -wal file until a checkpoint
+        mtimes = [os.stat(p).st_mtime for p in (self.path, Path(f"{self.path}-wal")) if os.path.exists(p)]
+        return max(mtimes) if mtimes else None
+
+    @METRICS.timed("sqlite_load")
+    def load(self, table: str) -> list:
+        columns = TABLES[table]["columns"]
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        decode = SCHEMAS[table].decoder(columns)
+        return [decode(values) for values in self.connect().execute(f'SELECT {quoted} FROM "{table}" ORDER BY rowid')]
+
+    def iter_chunks(self, table: str, size: int):
+        """Yields the rows in lists of up to size.
+
+        Each chunk is its own keyset query, so successive chunks may be
+        fetched from different threads.
+        """
+        columns = TABLES[table]["columns"]
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        decode = SCHEMAS[table].decoder(["rowid"] + columns)
+        last = 0
+        while True:
+            batch = self.connect().execute(
+                f'SELECT rowid, {quoted} FROM "{table}" WHERE rowid > ? ORDER BY rowid LIMIT ?', (last, size)
+            ).fetchall()
+            if not batch:
+                return
+            last = batch[-1][0]
+            yield [decode(values) for values in batch]
+
+    def append(self, table: str, rows: list):
+        """Appends row tuples and returns (signature before, signature after, rows as stored)"""
+        columns = TABLES[table]["columns"]
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        conn = self.connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.signature(table)
+            conn.executemany(f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders})',
+                             map(SCHEMAS[table].writer_for(columns), rows))
+            after = self.signature(table)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return before, after, rows
+
+def import_csvs(storage: SqliteStorage):
+    """One-shot import of the existing CSV files into an empty SQLite database"""
+    source = CsvStorage()
+    for table in TABLES:
+        if storage.signature(table) is not None:
+            print(f"Skipping {table}: table already has rows")
+            continue
+        rows = source.load(table)
+        if rows:
+            storage.append(table, rows)
+        print(f"Imported {len(rows)} rows into {table}")
+
+STORAGE_BACKEND = os.environ.get("FORM_WIDGETS_STORAGE", "csv")
+if STORAGE_BACKEND == "sqlite":
+    STORAGE = SqliteStorage(DB_FILE)
+elif STORAGE_BACKEND == "csv":
+    STORAGE = CsvStorage()
+else:
+    raise ValueError(f"Unknown FORM_WIDGETS_STORAGE backend: {STORAGE_BACKEND}")
+
+# ==================== Table Cache ====================
+class TableCache:
+    """Rows of one table, kept in memory between requests.
+
+    The table is reloaded from storage only when its signature changes
+    (file stat for CSV, highest rowid for SQLite). Writes go through
+    append() so the cached rows are updated in place instead of being
+    reloaded.
+    """
+
+    def __init__(self, table: str, storage):
+        self.table = table
+        self.storage = storage
+        self.signature = None
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def get_rows(self) -> list:
+        """Returns the cached rows, reloading them if the table changed"""
+        with self.lock:
+            signature = self.storage.signature(self.table)
+            if signature != self.signature:
+                self.rows = self.storage.load(self.table)
+                self.signature = signature
+            return self.rows
+
+    def append(self, rows: list):
+        """Appends row tuples to storage and to the cached rows"""
+        with self.lock:
+            before, after, stored = self.storage.append(self.table, rows)
+            if before != self.signature:
+                # Changed behind our back: let the next read reload the table
+                return
+            self.rows.extend(stored)
+            self.signature = after
+
+TABLE_CACHE = {table: TableCache(table, STORAGE) for table in TABLES}
+
+def table_version(*tables: str):
+    """(etag, last modified) of one or more tables, read from storage metadata only"""
+    signatures = [(table, STORAGE.signature(table)) for table in tables]
+    mtimes = [m for m in (STORAGE.last_modified(table) for table in tables) if m is not None]
+    return make_etag(STORAGE_BACKEND, signatures), max(mtimes) if mtimes else None
+
+async def check_tables(request: Request, response: Response, *tables: str) -> Optional[Response]:
+    """304 response if the client already has the current version of the tables"""
+    etag, last_modified = await IO.run(table_version, *tables)
+    return not_modified(request, response, etag, last_modified)
+
+# ==================== Group Commit ====================
+COMMIT_WINDOW = float(os.environ.get("FORM_WIDGETS_COMMIT_WINDOW_MS", "2")) / 1000
+
+class TableWriter:
+    """Write queue for one table.
+
+    Rows submitted within the same commit window are appended together
+    with one write and one fsync (one transaction on SQLite). A single
+    flusher task per table means appends never interleave, and each
+    caller is acknowledged only after its batch is durable.
+    """
+
+    def __init__(self, cache: TableCache):
+        self.cache = cache
+        self.pending = []
+        self.flusher = None
+
+    async def write(self, rows: list):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((rows, future))
+        if self.flusher is None or self.flusher.done():
+            self.flusher = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self):
+        while self.pending:
+            await asyncio.sleep(COMMIT_WINDOW)
+            batch, self.pending = self.pending, []
+            rows = [row for rows, _ in batch for row in rows]
+            try:
+                await IO.run(self.cache.append, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+TABLE_WRITERS = {table: TableWriter(cache) for table, cache in TABLE_CACHE.items()}
+
+class TableView(ABC):
+    """Structure derived from a TableCache and kept in step with its rows.
+
+    Rows appended to the cache are fed to add() one at a time. When the
+    cache reloads the file it hands out a new list, which triggers reset()
+    and a full rebuild.
+    """
+
+    def __init__(self, table: TableCache):
+        self.table = table
+        self.rows = None
+        self.count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def schema(self) -> Schema:
+        return SCHEMAS[self.table.table]
+
+    @abstractmethod
+    def reset(self):
+        """Clears the view before it is rebuilt from a reloaded table"""
+
+    @abstractmethod
+    def add(self, rowid: int, row: tuple):
+        """Adds one row of the table to the view"""
+
+    def sync(self) -> list:
+        """Brings the view up to date and returns the rows it covers"""
+        rows = self.table.get_rows()
+        with self.lock:
+            if rows is not self.rows:
+                self.reset()
+                self.rows = rows
+                self.count = 0
+            while self.count < len(rows):
+                self.add(self.count, rows[self.count])
+                self.count += 1
+        return rows
+
+# ==================== Paging, Sorting and Projection ====================
+NUMBER_STRIP_RE = re.compile(r"[$,%x\s]")
+
+def parse_number(value) -> float:
+    """Parses numeric-looking text such as $275000000, 2.35% or 1.25x; nan if it is not a number"""
+    try:
+        return float(NUMBER_STRIP_RE.sub("", value))
+    except (TypeError, ValueError):
+        return math.nan
+
+def sort_key(value):
+    """Orders numeric-looking values ($, %, x suffixes) as numbers, the rest as text, blanks last"""
+    if value is None or value == "":
+        return (2, 0.0, "")
+    number = parse_number(value)
+    if math.isnan(number):
+        return (1, 0.0, str(value).lower())
+    return (0, number, "")
+
+class SortIndex:
+    """Sorted row orders for one table, one per column.
+
+    An order is sorted once and then kept up to date: rows appended to the
+    same list are inserted with a binary search instead of re-sorting the
+    table. Only a reloaded table (a new rows list) sorts from scratch.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self.lock = threading.Lock()
+
+    def window(self, rows: list, column: str, value, start: int, stop: int, descending: bool = False) -> list:
+        """Row ids at positions start:stop of rows sorted by column, read by value(row).
+
+        Blank values come last in either direction.
+        """
+        key = lambda rowid: sort_key(value(rows[rowid]))
+        with self.lock:
+            order = self.orders.get(column)
+            if order is None or order[0] is not rows:
+                keys = [sort_key(value(row)) for row in rows]
+                rowids = sorted(range(len(keys)), key=keys.__getitem__)
+                valued = len(keys) - sum(1 for k in keys if k[0] == 2)
+                order = self.orders[column] = [rows, len(keys), rowids, valued]
+            _, count, rowids, valued = order
+            for rowid in range(count, len(rows)):
+                k = key(rowid)
+                # After equal keys, as the stable sort would place it
+                rowids.insert(bisect.bisect_right(rowids, k, key=key), rowid)
+                valued += k[0] != 2
+            order[1], order[3] = len(rows), valued
+            if descending:
+                # Walk the valued part of the ascending order backwards instead
+                # of copying it; blanks stay last
+                return [rowids[valued - 1 - i] if i < valued else rowids[i] for i in range(start, stop)]
+            return rowids[start:stop]
+
+SORT_INDEX = {table: SortIndex() for table in TABLES}
+
+class Page:
+    """Query parameters for paging, sorting and projecting a table endpoint"""
+
+    def __init__(
+        self,
+        offset: int = Query(0, ge=0, description="Number of rows to skip"),
+        limit: Optional[int] = Query(None, ge=0, description="Maximum number of rows to return"),
+        sort_by: str = Query("", description="Column to sort by"),
+        order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+        columns: str = Query("", description="Comma-separated columns to return"),
+        stream: Optional[Literal["json", "ndjson"]] = Query(None, description="Stream rows straight from storage as a JSON array or NDJSON"),
+    ):
+        self.offset = offset
+        self.limit = limit
+        self.sort_by = sort_by
+        self.order = order
+        self.columns = [c.strip() for c in columns.split(",") if c.strip()]
+        self.stream = stream
+
+    def validate(self, known_columns: list):
+        unknown = [c for c in self.columns + ([self.sort_by] if self.sort_by else []) if c not in known_columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+        if self.stream and (self.sort_by or self.order == "desc"):
+            raise ValueError("Sorting is not supported when streaming")
+
+    def apply(self, rows: list, sorter: SortIndex, schema: Schema, response: Response) -> list:
+        """Sorts, slices and projects row tuples into dicts. Raises ValueError for unknown columns.
+
+        Run it on the I/O pool: the first sort of a column reads every row.
+        """
+        self.validate(schema.columns)
+
+        total = len(rows)
+        response.headers["X-Total-Count"] = str(total)
+        start = min(self.offset, total)
+        stop = total if self.limit is None else min(start + self.limit, total)
+
+        if self.sort_by:
+            rowids = sorter.window(rows, self.sort_by, schema.value(self.sort_by), start, stop, self.order == "desc")
+            window = [rows[rowid] for rowid in rowids]
+        elif self.order == "desc":
+            window = [rows[total - 1 - i] for i in range(start, stop)]
+        else:
+            window = rows[start:stop]
+        return schema.to_dicts(window, self.columns)
+
+STREAM_CHUNK_ROWS = int(os.environ.get("FORM_WIDGETS_STREAM_CHUNK_ROWS", "1000"))
+
+def stream_tables(sources: list, page: Page, known_columns: list, headers: dict) -> StreamingResponse:
+    """Streams rows from storage without materializing the table.
+
+    sources is a list of (table, extra fields added to each row). Rows
+    are read and encoded one chunk at a time on the I/O pool, so memory
+    stays flat however large the tables grow.
+    """
+    page.validate(known_columns)
+
+    async def body():
+        skip = page.offset
+        remaining = page.limit
+        first = True
+        if page.stream == "json":
+            yield b"["
+        for table, extra in sources:
+            chunks = STORAGE.iter_chunks(table, STREAM_CHUNK_ROWS)
+            try:
+                while remaining is None or remaining > 0:
+                    rows = await IO.run(next, chunks, None)
+                    if rows is None:
+                        break
+                    if skip:
+                        dropped = min(skip, len(rows))
+                        rows = rows[dropped:]
+                        skip -= dropped
+                    if remaining is not None:
+                        rows = rows[:remaining]
+                        remaining -= len(rows)
+                    if not rows:
+                        continue
+                    rows = SCHEMAS[table].to_dicts(rows)
+                    if extra:
+                        rows = [{**row, **extra} for row in rows]
+                    if page.columns:
+                        rows = [{c: row.get(c) for c in page.columns} for row in rows]
+                    encoded = [json.dumps(row, ensure_ascii=False) for row in rows]
+                    if page.stream == "ndjson":
+                        yield ("\n".join(encoded) + "\n").encode("utf-8")
+                    else:
+                        yield (("" if first else ",") + ",".join(encoded)).encode("utf-8")
+                    first = False
+            finally:
+                await IO.run(chunks.close)
+        if page.stream == "json":
+            yield b"]"
+
+    media_type = "application/x-ndjson" if page.stream == "ndjson" else "application/json"
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+def bad_request(error: Exception) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"error": str(error)})
 
 # ==================== WIDGET 1: Deal Entry ====================
 @register_widget({
@@ -141,43 +867,113 @@ ACCOUNTS_FILE = Path(__file__).parent.resolve() / "involved_accounts.csv"
             ]
         }
     ]
-})
+}, table="deals")
 @app.get("/salesforce/deals")
-async def get_salesforce_deals():
-    """Returns the list of submitted deals from CSV"""
-    if not CSV_FILE.exists():
-        return [{"opportunity_name": None, "sector": None, "product": None, "source": None, "stage": None, "takedown_date": None, "description": None}]
+async def get_salesforce_deals(request: Request, response: Response, page: Page = Depends()):
+    """Returns the list of submitted deals"""
+    cached = await check_tables(request, response, "deals")
+    if cached:
+        return cached
+    if page.stream:
+        try:
+            return stream_tables([("deals", None)], page, SCHEMAS["deals"].columns, dict(response.headers))
+        except ValueError as e:
+            return bad_request(e)
+    deals = await IO.run(TABLE_CACHE["deals"].get_rows)
+    if deals:
+        try:
+            return await IO.run(page.apply, deals, SORT_INDEX["deals"], SCHEMAS["deals"], response)
+        except ValueError as e:
+            return bad_request(e)
+    return [SCHEMAS["deals"].placeholder]
+
+def clean_deal(params: dict) -> tuple:
+    """Validates a deal and returns its row for storage; raises ValueError with the message to show"""
+    if not params.get("opportunity_name"):
+        raise ValueError("Opportunity name is required")
     
-    deals = []
-    with open(CSV_FILE, mode='r', newline='') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            deals.append(row)
-    return deals if deals else [{"opportunity_name": None, "sector": None, "product": None, "source": None, "stage": None, "takedown_date": None, "description": None}]
+    if not params.get("sector") or not params.get("product"):
+        raise ValueError("Sector and product are required")
+    return SCHEMAS["deals"].encode(params)
 
 @app.post("/salesforce/deals")
 async def submit_salesforce_deal(params: dict) -> JSONResponse:
     """Handles deal form submissions"""
-    if not params.get("opportunity_name"):
-        return JSONResponse(status_code=400, content={"error": "Opportunity name is required"})
-    
-    if not params.get("sector") or not params.get("product"):
-        return JSONResponse(status_code=400, content={"error": "Sector and product are required"})
+    try:
+        row = clean_deal(params)
+    except ValueError as e:
+        return bad_request(e)
     
-    params.pop("submit", None)
-    file_exists = CSV_FILE.exists()
-    if params.get('takedown_date'):
-        params['takedown_date'] = str(params['takedown_date'])
-    
-    fieldnames = ["opportunity_name", "sector", "product", "source", "stage", "takedown_date", "description"]
-    with open(CSV_FILE, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(params)
+    await TABLE_WRITERS["deals"].write([row])
+    await IO.run(DEAL_PIPELINE.sync)
         
     return JSONResponse(content={"success": True})
 
+class DealPipeline(TableView):
+    """Deal counts by stage x sector x product x source, kept up to date as deals arrive.
+
+    Each deal bumps one cell count, its takedown month within the cell and
+    the stage and month totals, so a submission costs O(1) and the table
+    is only scanned when it is reloaded. Cells are keyed by the rows'
+    Categories codes, which also gives the stages their DI1-DI9 order.
+    """
+
+    DIMENSIONS = ("stage", "sector", "product", "source")
+
+    def reset(self):
+        index = self.schema.index
+        self.dimensions_at = [index[c] for c in self.DIMENSIONS]
+        self.takedown_at = index["takedown_date"]
+        self.cells = {}
+        self.by_stage = {}
+        self.by_month = {}
+
+    def add(self, rowid: int, row: tuple):
+        key = tuple(row[p] for p in self.dimensions_at)
+        month = takedown_month(row[self.takedown_at])
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0, {}]
+        cell[0] += 1
+        cell[1][month] = cell[1].get(month, 0) + 1
+        self.by_stage[key[0]] = self.by_stage.get(key[0], 0) + 1
+        self.by_month[month] = self.by_month.get(month, 0) + 1
+
+    def summary(self) -> dict:
+        self.sync()
+        labels = [self.schema.categories[c].values for c in self.DIMENSIONS]
+        label = lambda i, code: labels[i][code] or "Unspecified"
+        with self.lock:
+            return {
+                "count": self.count,
+                "by_stage": [{"stage": label(0, code), "count": self.by_stage[code]} for code in sorted(self.by_stage)],
+                "by_takedown_month": [{"month": month, "count": n} for month, n in sorted(self.by_month.items())],
+                "cells": [
+                    {
+                        **{c: label(i, code) for i, (c, code) in enumerate(zip(self.DIMENSIONS, key))},
+                        "count": count,
+                        "by_takedown_month": dict(sorted(months.items())),
+                    }
+                    for key, (count, months) in sorted(self.cells.items())
+                ],
+            }
+
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+def takedown_month(value: str) -> str:
+    """YYYY-MM bucket of a takedown date, "Unscheduled" if it is missing or not a date"""
+    return value[:7] if DATE_RE.match(value or "") else "Unscheduled"
+
+DEAL_PIPELINE = DealPipeline(TABLE_CACHE["deals"])
+
+@app.get("/salesforce/deals/pipeline")
+async def get_deal_pipeline(request: Request, response: Response):
+    """Deal counts and takedown months by stage, sector, product and source"""
+    cached = await check_tables(request, response, "deals")
+    if cached:
+        return cached
+    return await IO.run(DEAL_PIPELINE.summary)
+
 
 # ==================== WIDGET 2: Tranche Participation ====================
 @register_widget({
@@ -220,6 +1016,7 @@ async def submit_salesforce_deal(params: dict) -> JSONResponse:
                 {"paramName": "use_of_proceeds", "type": "text", "value": "", "label": "Use of Proceeds"},
                 {"paramName": "original_principal", "type": "text", "value": "", "label": "💵 Original Principal Amount"},
                 {"paramName": "current_balance", "type": "text", "value": "", "label": "Current Outstanding Balance"},
+                {"paramName": "unfunded_commitment", "type": "text", "value": "", "label": "Unfunded Commitment"},
                 {
                     "paramName": "rate_type",
                     "type": "text",
@@ -231,55 +1028,217 @@ async def submit_salesforce_deal(params: dict) -> JSONResponse:
                         {"label": "Capped Floater", "value": "Capped Floater"}
                     ]
                 },
+                {
+                    "paramName": "base_index",
+                    "type": "text",
+                    "value": "",
+                    "label": "Base Index",
+                    "options": [
+                        {"label": "None (Fixed)", "value": ""},
+                        {"label": "SOFR", "value": "SOFR"},
+                        {"label": "MMD", "value": "MMD"}
+                    ]
+                },
+                {"paramName": "spread_bps", "type": "text", "value": "", "label": "Spread (bps)"},
+                {"paramName": "floor_cap", "type": "text", "value": "", "label": "Floor / Cap"},
+                {"paramName": "all_in_rate", "type": "text", "value": "", "label": "All-in Rate"},
+                {
+                    "paramName": "day_count",
+                    "type": "text",
+                    "value": "",
+                    "label": "Day Count",
+                    "options": [
+                        {"label": "Actual/360", "value": "Actual/360"},
+                        {"label": "Actual/365", "value": "Actual/365"},
+                        {"label": "30/360", "value": "30/360"}
+                    ]
+                },
                 {"paramName": "origination_date", "type": "date", "value": "", "label": "Origination Date"},
                 {"paramName": "maturity_date", "type": "date", "value": "", "label": "Maturity Date"},
+                {
+                    "paramName": "amortization_type",
+                    "type": "text",
+                    "value": "",
+                    "label": "Amortization",
+                    "options": [
+                        {"label": "Interest Only", "value": "Interest Only"},
+                        {"label": "IO-to-Amort", "value": "IO-to-Amort"},
+                        {"label": "Fully Amortizing", "value": "Fully Amortizing"}
+                    ]
+                },
+                {"paramName": "io_period_months", "type": "text", "value": "", "label": "IO Period (months)"},
+                {"paramName": "extension_options", "type": "text", "value": "", "label": "Extension Options"},
+                {
+                    "paramName": "lien_position",
+                    "type": "text",
+                    "value": "",
+                    "label": "Lien Position",
+                    "options": [
+                        {"label": "1st Lien", "value": "1st Lien"},
+                        {"label": "2nd Lien", "value": "2nd Lien"},
+                        {"label": "Parity", "value": "Parity"}
+                    ]
+                },
+                {"paramName": "ltv_ltc_limit", "type": "text", "value": "", "label": "LTV / LTC Limit"},
+                {"paramName": "dscr_covenant", "type": "text", "value": "", "label": "DSCR Covenant"},
+                {
+                    "paramName": "recourse",
+                    "type": "text",
+                    "value": "",
+                    "label": "Recourse",
+                    "options": [
+                        {"label": "Non-Recourse", "value": "Non-Recourse"},
+                        {"label": "Limited/Burn-off", "value": "Limited/Burn-off"},
+                        {"label": "Full Recourse", "value": "Full Recourse"}
+                    ]
+                },
                 {"paramName": "submit_tranche", "type": "button", "label": "✅ Submit Tranche", "value": True}
             ]
         }
     ]
-})
+}, table="tranches")
 @app.get("/salesforce/tranches")
-async def get_tranches():
+async def get_tranches(request: Request, response: Response, page: Page = Depends()):
     """Returns the list of tranche data"""
-    if not TRANCHE_FILE.exists():
-        return [{"tranche_name": None, "facility_type": None, "tax_status": None, "use_of_proceeds": None,
-                 "original_principal": None, "current_balance": None, "rate_type": None, 
-                 "origination_date": None, "maturity_date": None}]
-    
-    tranches = []
-    with open(TRANCHE_FILE, mode='r', newline='') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            tranches.append(row)
-    return tranches if tranches else [{"tranche_name": None, "facility_type": None, "tax_status": None, 
-                                       "use_of_proceeds": None, "original_principal": None, "current_balance": None,
-                                       "rate_type": None, "origination_date": None, "maturity_date": None}]
+    cached = await check_tables(request, response, "tranches")
+    if cached:
+        return cached
+    if page.stream:
+        try:
+            return stream_tables([("tranches", None)], page, SCHEMAS["tranches"].columns, dict(response.headers))
+        except ValueError as e:
+            return bad_request(e)
+    tranches = await IO.run(TABLE_CACHE["tranches"].get_rows)
+    if tranches:
+        try:
+            return await IO.run(page.apply, tranches, SORT_INDEX["tranches"], SCHEMAS["tranches"], response)
+        except ValueError as e:
+            return bad_request(e)
+    return [SCHEMAS["tranches"].placeholder]
+
+def clean_tranche(params: dict) -> tuple:
+    """Validates a tranche and returns its row for storage; raises ValueError with the message to show"""
+    if not params.get("tranche_name"):
+        raise ValueError("Tranche name is required")
+    return SCHEMAS["tranches"].encode(params)
 
 @app.post("/salesforce/tranches")
 async def submit_tranche(params: dict) -> JSONResponse:
     """Handles tranche form submissions"""
-    if not params.get("tranche_name"):
-        return JSONResponse(status_code=400, content={"error": "Tranche name is required"})
-    
-    params.pop("submit_tranche", None)
-    file_exists = TRANCHE_FILE.exists()
+    try:
+        row = clean_tranche(params)
+    except ValueError as e:
+        return bad_request(e)
     
-    if params.get('origination_date'):
-        params['origination_date'] = str(params['origination_date'])
-    if params.get('maturity_date'):
-        params['maturity_date'] = str(params['maturity_date'])
-    
-    fieldnames = ["tranche_name", "facility_type", "tax_status", "use_of_proceeds",
-                  "original_principal", "current_balance", "rate_type", 
-                  "origination_date", "maturity_date"]
-    with open(TRANCHE_FILE, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(params)
+    await TABLE_WRITERS["tranches"].write([row])
         
     return JSONResponse(content={"success": True})
 
+class TrancheColumns(TableView):
+    """Typed, columnar copy of the tranche table for portfolio aggregation.
+
+    Numeric text is parsed once, as each row enters the view, straight
+    into preallocated NumPy columns; grouping columns keep the rows'
+    Categories codes. Capacity doubles when full, so an added row costs
+    amortized O(1) and aggregation works on views of the filled part.
+    """
+
+    NUMERIC = ("original_principal", "current_balance", "unfunded_commitment", "spread_bps",
+               "all_in_rate", "io_period_months", "ltv_ltc_limit", "dscr_covenant")
+    GROUPS = ("facility_type", "tax_status", "lien_position")
+
+    INITIAL_CAPACITY = 1024
+
+    def reset(self):
+        self.numeric_at = [(c, self.schema.index[c]) for c in self.NUMERIC]
+        self.groups_at = [(c, self.schema.index[c]) for c in self.GROUPS]
+        self.values = {c: np.empty(self.INITIAL_CAPACITY, dtype=np.float64) for c in self.NUMERIC}
+        self.codes = {c: np.empty(self.INITIAL_CAPACITY, dtype=np.int32) for c in self.GROUPS}
+
+    def _grow(self):
+        for columns in (self.values, self.codes):
+            for c, array in columns.items():
+                grown = np.empty(len(array) * 2, dtype=array.dtype)
+                grown[:len(array)] = array
+                columns[c] = grown
+
+    def add(self, rowid: int, row: tuple):
+        if rowid == len(self.values[self.NUMERIC[0]]):
+            self._grow()
+        for c, p in self.numeric_at:
+            self.values[c][rowid] = parse_number(row[p])
+        for c, p in self.groups_at:
+            self.codes[c][rowid] = row[p]
+
+    def columns(self):
+        """(numeric arrays, group code arrays, group labels) for the current rows"""
+        with self.lock:
+            # Views of the filled part; rows added later land beyond it, or in new arrays
+            n = self.count
+            return (
+                {c: array[:n] for c, array in self.values.items()},
+                {c: array[:n] for c, array in self.codes.items()},
+                {c: [value or "Unspecified" for value in self.schema.categories[c].values]
+                 for c in self.GROUPS},
+            )
+
+    def summary(self) -> dict:
+        self.sync()
+        numeric, codes, labels = self.columns()
+        balance = np.nan_to_num(numeric["current_balance"])
+
+        def weighted(values, codes=None, groups=0):
+            # Balance-weighted mean over the rows where the value is known
+            known = ~np.isnan(values)
+            weights = np.where(known, balance, 0.0)
+            products = np.where(known, values, 0.0) * weights
+            if codes is None:
+                total = weights.sum()
+                return products.sum() / total if total else math.nan
+            totals = np.bincount(codes, weights=weights, minlength=groups)
+            sums = np.bincount(codes, weights=products, minlength=groups)
+            return np.divide(sums, totals, out=np.full(groups, math.nan), where=totals != 0)
+
+        def grouped(column):
+            group_codes = codes[column]
+            n = len(labels[column])
+            counts = np.bincount(group_codes, minlength=n)
+            sums = {c: np.bincount(group_codes, weights=np.nan_to_num(numeric[c]), minlength=n)
+                    for c in ("original_principal", "current_balance", "unfunded_commitment")}
+            rate = weighted(numeric["all_in_rate"], group_codes, n)
+            return [
+                {
+                    column: label,
+                    "count": int(counts[i]),
+                    **{c: float(sums[c][i]) for c in sums},
+                    "weighted_all_in_rate": json_number(rate[i]),
+                }
+                for i, label in enumerate(labels[column])
+                if counts[i]
+            ]
+
+        return {
+            "count": self.count,
+            "totals": {c: float(np.nansum(numeric[c]))
+                       for c in ("original_principal", "current_balance", "unfunded_commitment")},
+            "weighted_averages": {c: json_number(weighted(numeric[c]))
+                                  for c in ("all_in_rate", "spread_bps", "io_period_months", "ltv_ltc_limit", "dscr_covenant")},
+            **{f"by_{column}": grouped(column) for column in self.GROUPS},
+        }
+
+def json_number(value) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+TRANCHE_COLUMNS = TrancheColumns(TABLE_CACHE["tranches"])
+
+@app.get("/salesforce/tranches/summary")
+async def get_tranche_summary(request: Request, response: Response):
+    """Portfolio totals, balance-weighted rates and exposure by facility type, tax status and lien position"""
+    cached = await check_tables(request, response, "tranches")
+    if cached:
+        return cached
+    return await IO.run(TRANCHE_COLUMNS.summary)
+
 
 # ==================== WIDGET 3: Real Estate Assets ====================
 @register_widget({
@@ -318,63 +1277,196 @@ async def submit_tranche(params: dict) -> JSONResponse:
             ]
         }
     ]
-})
+}, table="assets")
 @app.get("/salesforce/realestate")
-async def get_realestate():
+async def get_realestate(request: Request, response: Response, page: Page = Depends()):
     """Returns the list of real estate assets"""
-    if not ASSET_FILE.exists():
-        return [{"property_name": None, "property_address": None, "property_type": None, "square_footage": None, 
-                 "market_value": None, "occupancy_rate": None, "acquisition_date": None, "asset_notes": None}]
-    
-    assets = []
-    with open(ASSET_FILE, mode='r', newline='') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            assets.append(row)
-    return assets if assets else [{"property_name": None, "property_address": None, "property_type": None, 
-                                   "square_footage": None, "market_value": None, "occupancy_rate": None, 
-                                   "acquisition_date": None, "asset_notes": None}]
+    cached = await check_tables(request, response, "assets")
+    if cached:
+        return cached
+    if page.stream:
+        try:
+            return stream_tables([("assets", None)], page, SCHEMAS["assets"].columns, dict(response.headers))
+        except ValueError as e:
+            return bad_request(e)
+    assets = await IO.run(TABLE_CACHE["assets"].get_rows)
+    if assets:
+        try:
+            return await IO.run(page.apply, assets, SORT_INDEX["assets"], SCHEMAS["assets"], response)
+        except ValueError as e:
+            return bad_request(e)
+    return [SCHEMAS["assets"].placeholder]
+
+def clean_asset(params: dict) -> tuple:
+    """Validates a real estate asset and returns its row for storage; raises ValueError with the message to show"""
+    if not params.get("property_name"):
+        raise ValueError("Property name is required")
+    return SCHEMAS["assets"].encode(params)
 
 @app.post("/salesforce/realestate")
 async def submit_realestate(params: dict) -> JSONResponse:
     """Handles real estate asset form submissions"""
-    if not params.get("property_name"):
-        return JSONResponse(status_code=400, content={"error": "Property name is required"})
+    try:
+        row = clean_asset(params)
+    except ValueError as e:
+        return bad_request(e)
     
-    params.pop("submit_asset", None)
-    file_exists = ASSET_FILE.exists()
-    if params.get('acquisition_date'):
-        params['acquisition_date'] = str(params['acquisition_date'])
-    
-    fieldnames = ["property_name", "property_address", "property_type", "square_footage", "market_value", 
-                  "occupancy_rate", "acquisition_date", "asset_notes"]
-    with open(ASSET_FILE, mode='a', newline='') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(params)
+    await TABLE_WRITERS["assets"].write([row])
         
     return JSONResponse(content={"success": True})
 
+# ==================== Hub ====================
+# The hub widget's config lives in hub_widget.py; its data is served here.
+# Component tables of the hub and the _type tag given to their rows
+HUB_SOURCES = (("deals", "deal"), ("tranches", "tranche"), ("assets", "asset"))
+
+class UnionSchema:
+    """Columns and row codecs of a union of tables, for Page.apply.
+
+    Rows are (row_type, row tuple) pairs. Each row is decoded with its own
+    table's schema and tagged with _type, so a row carries only its
+    table's columns, exactly as stream_tables writes it.
+    """
+
+    def __init__(self, sources):
+        self.schemas = {row_type: SCHEMAS[table] for table, row_type in sources}
+        self.columns = list(dict.fromkeys(["_type"] + [c for s in self.schemas.values() for c in s.columns]))
+
+    def value(self, column: str):
+        """Function returning the value of column in a row, None for rows of tables without it"""
+        if column == "_type":
+            return itemgetter(0)
+        getters = {row_type: s.value(column) for row_type, s in self.schemas.items() if column in s.index}
+        return lambda row: getters[row[0]](row[1]) if row[0] in getters else None
+
+    def to_dicts(self, rows, columns: Optional[list] = None) -> list:
+        """Rows as JSON-ready dicts, optionally projected to columns"""
+        decoders = {row_type: s.projection() for row_type, s in self.schemas.items()}
+        dicts = [{**decoders[row_type](row), "_type": row_type} for row_type, row in rows]
+        if columns:
+            dicts = [{c: d.get(c) for c in columns} for d in dicts]
+        return dicts
+
+HUB_SCHEMA = UnionSchema(HUB_SOURCES)
+HUB_COLUMNS = HUB_SCHEMA.columns
+
+class HubView:
+    """Materialized union of the hub's component tables.
+
+    Each component keeps its own list of (_type, row) pairs, which share
+    the row tuples of the table cache.
+    On refresh the components are checked concurrently, only rows of a
+    component whose table changed are (re)tagged, and the union is
+    rebuilt only if something changed. An unchanged hub costs one stat
+    per table.
+    """
+
+    def __init__(self):
+        self.parts = {table: (None, []) for table, _ in HUB_SOURCES}
+        self.rows = []
+        self.sorter = SortIndex()
+        self.lock = asyncio.Lock()
+
+    async def refresh(self) -> list:
+        async with self.lock:
+            loaded = await asyncio.gather(*(IO.run(TABLE_CACHE[table].get_rows) for table, _ in HUB_SOURCES))
+            changed = False
+            for (table, row_type), rows in zip(HUB_SOURCES, loaded):
+                source, tagged = self.parts[table]
+                if rows is source and len(tagged) == len(rows):
+                    continue
+                if rows is not source:
+                    # The table was reloaded, re-tag it from scratch
+                    tagged = []
+                tagged.extend((row_type, row) for row in rows[len(tagged):])
+                self.parts[table] = (rows, tagged)
+                changed = True
+            if changed:
+                self.rows = [row for table, _ in HUB_SOURCES for row in self.parts[table][1]]
+            return self.rows
+
+HUB_VIEW = HubView()
+
+@app.get("/salesforce/hub")
+async def get_hub_data(request: Request, response: Response, page: Page = Depends()):
+    """Returns combined data from all three sources"""
+    cached = await check_tables(request, response, *(table for table, _ in HUB_SOURCES))
+    if cached:
+        return cached
+    if page.stream:
+        try:
+            sources = [(table, {"_type": row_type}) for table, row_type in HUB_SOURCES]
+            return stream_tables(sources, page, HUB_COLUMNS, dict(response.headers))
+        except ValueError as e:
+            return bad_request(e)
+    
+    hub = await HUB_VIEW.refresh()
+    if not hub:
+        return [{"_type": "No data yet"}]
+    try:
+        return await IO.run(page.apply, hub, HUB_VIEW.sorter, HUB_SCHEMA, response)
+    except ValueError as e:
+        return bad_request(e)
+
 
 # ==================== WIDGET 4: Involved Accounts (Dynamic Lookup) ====================
+class AccountOptions(TableView):
+    """Dropdown options sorted by case-folded account name, for prefix lookups.
+
+    Option objects are built once per account. New rows wait in a pending
+    list and are merged into the sorted entries on the next lookup.
+    Timsort merges the two sorted runs in linear time.
+    """
+
+    def reset(self):
+        self.name_at = self.schema.index["account_name"]
+        self.type_at = self.schema.index["account_type"]
+        self.type_names = self.schema.categories["account_type"].values
+        self.entries = []
+        self.keys = []
+        self.pending = []
+
+    def add(self, rowid: int, row: tuple):
+        name = row[self.name_at] or ''
+        # Format: "Company Name (Type)" for the dropdown
+        option = {"label": f"{name} ({self.type_names[row[self.type_at]]})", "value": name}
+        self.pending.append((name.casefold(), rowid, option))
+
+    @METRICS.timed("account_prefix_search")
+    def lookup(self, prefix: str = "", limit: Optional[int] = None) -> list:
+        self.sync()
+        with self.lock:
+            if self.pending:
+                self.pending.sort()
+                self.entries = sorted(self.entries + self.pending)
+                self.keys = [key for key, _, _ in self.entries]
+                self.pending = []
+            prefix = prefix.casefold()
+            start = bisect.bisect_left(self.keys, prefix)
+            stop = len(self.keys) if limit is None else min(start + limit, len(self.keys))
+            options = []
+            for i in range(start, stop):
+                if not self.keys[i].startswith(prefix):
+                    break
+                options.append(self.entries[i][2])
+            return options
+
+ACCOUNT_OPTIONS = AccountOptions(TABLE_CACHE["accounts"])
+
 # This endpoint provides the list of existing accounts for the dynamic dropdown
 @app.get("/salesforce/accounts/list")
-async def get_accounts_list():
+async def get_accounts_list(
+    request: Request,
+    response: Response,
+    q: str = Query("", description="Account name prefix (case-insensitive)"),
+    limit: int = Query(50, ge=1, description="Maximum number of options to return for a prefix q"),
+):
     """Returns list of existing accounts for dynamic dropdown lookup"""
-    if not ACCOUNTS_FILE.exists():
-        return []
-    
-    accounts = []
-    with open(ACCOUNTS_FILE, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # Format: "Company Name (Type)" for the dropdown
-            accounts.append({
-                "label": f"{row['account_name']} ({row['account_type']})",
-                "value": row['account_name']
-            })
-    return accounts
+    cached = await check_tables(request, response, "accounts")
+    if cached:
+        return cached
+    # The dropdown itself never sends q and must offer every account
+    return await IO.run(ACCOUNT_OPTIONS.lookup, q, limit if q else None)
 
 @register_widget({
     "name": "🤝 Involved Accounts",
@@ -432,56 +1524,142 @@ async def get_accounts_list():
             ]
         }
     ]
-})
+}, table="accounts")
 @app.get("/salesforce/accounts")
-async def get_accounts():
+async def get_accounts(request: Request, response: Response, page: Page = Depends()):
     """Returns the list of involved accounts"""
-    if not ACCOUNTS_FILE.exists():
-        return [{
-            "account_name": None, "account_type": None, "primary_contact": None, 
-            "contact_email": None, "contact_phone": None, "business_focus": None,
-            "relationship_status": None, "account_notes": None
-        }]
-    
-    accounts = []
-    with open(ACCOUNTS_FILE, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            accounts.append(row)
-    return accounts if accounts else [{
-        "account_name": None, "account_type": None, "primary_contact": None,
-        "contact_email": None, "contact_phone": None, "business_focus": None,
-        "relationship_status": None, "account_notes": None
-    }]
+    cached = await check_tables(request, response, "accounts")
+    if cached:
+        return cached
+    if page.stream:
+        try:
+            return stream_tables([("accounts", None)], page, SCHEMAS["accounts"].columns, dict(response.headers))
+        except ValueError as e:
+            return bad_request(e)
+    accounts = await IO.run(TABLE_CACHE["accounts"].get_rows)
+    if accounts:
+        try:
+            return await IO.run(page.apply, accounts, SORT_INDEX["accounts"], SCHEMAS["accounts"], response)
+        except ValueError as e:
+            return bad_request(e)
+    return [SCHEMAS["accounts"].placeholder]
 
-@app.post("/salesforce/accounts")
-async def submit_account(params: dict) -> JSONResponse:
-    """Handles account form submissions"""
+def clean_account(params: dict) -> tuple:
+    """Validates an account and returns its row for storage; raises ValueError with the message to show"""
     # If they selected from lookup dropdown, use that as the account name
     if params.get("account_lookup") and not params.get("account_name"):
         params["account_name"] = params.get("account_lookup")
     
     if not params.get("account_name"):
-        return JSONResponse(status_code=400, content={"error": "Account name is required"})
-    
-    # Remove submit button and lookup field from saved data
-    params.pop("submit_account", None)
-    params.pop("account_lookup", None)  # Don't save the lookup field
-    
-    file_exists = ACCOUNTS_FILE.exists()
+        raise ValueError("Account name is required")
+    # The lookup field and submit button are not part of the schema, so they are not saved
+    return SCHEMAS["accounts"].encode(params)
+
+@app.post("/salesforce/accounts")
+async def submit_account(params: dict) -> JSONResponse:
+    """Handles account form submissions"""
+    try:
+        row = clean_account(params)
+    except ValueError as e:
+        return bad_request(e)
     
-    fieldnames = ["account_name", "account_type", "primary_contact", "contact_email", 
-                  "contact_phone", "business_focus", "relationship_status", "account_notes"]
-    with open(ACCOUNTS_FILE, mode='a', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(params)
+    await TABLE_WRITERS["accounts"].write([row])
+    await IO.run(ACCOUNT_INDEX.sync)
         
     return JSONResponse(content={"success": True})
 
 
 # ==================== WIDGET 5: Account Lookup (Omni Widget) ====================
+WORD_RE = re.compile(r"\w+")
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class AccountSearchIndex(TableView):
+    """Inverted index over the searchable account fields.
+
+    Every word in the searchable fields maps to the set of rows containing
+    it, and a trigram index over the vocabulary finds the words containing
+    a query token. Candidate rows are then checked with the same substring
+    test the lookup has always used, so results are exact. The type and
+    status filters are keyed by Categories code.
+    """
+
+    SEARCH_FIELDS = ("account_name", "primary_contact", "business_focus", "account_notes")
+
+    def reset(self):
+        index = self.schema.index
+        self.search_at = [index[field] for field in self.SEARCH_FIELDS]
+        self.type_at = index["account_type"]
+        self.status_at = index["relationship_status"]
+        self.texts = []
+        self.words = {}
+        self.word_grams = {}
+        self.by_type = {}
+        self.by_status = {}
+
+    def add(self, rowid: int, row: tuple):
+        texts = tuple((row[p] or '').lower() for p in self.search_at)
+        self.texts.append(texts)
+        for word in set(WORD_RE.findall(" ".join(texts))):
+            postings = self.words.get(word)
+            if postings is None:
+                postings = self.words[word] = set()
+                for gram in trigrams(word):
+                    self.word_grams.setdefault(gram, set()).add(word)
+            postings.add(rowid)
+        self.by_type.setdefault(row[self.type_at], set()).add(rowid)
+        self.by_status.setdefault(row[self.status_at], set()).add(rowid)
+
+    def _words_containing(self, token: str):
+        if len(token) < 3:
+            return [word for word in self.words if token in word]
+        grams = sorted((self.word_grams.get(gram, ()) for gram in trigrams(token)), key=len)
+        return [word for word in grams[0] if token in word and all(word in g for g in grams[1:])]
+
+    def _rank(self, rowid: int, term: str):
+        texts = self.texts[rowid]
+        if texts[0].startswith(term):
+            return (0, rowid)
+        for rank, text in enumerate(texts, start=1):
+            if term in text:
+                return (rank, rowid)
+        return None
+
+    @METRICS.timed("account_search")
+    def search(self, term: str = "", account_type: str = "", relationship: str = "", limit: Optional[int] = None) -> list:
+        """Returns the matching rows as dicts, best matches first"""
+        with self.lock:
+            sets = []
+            categories = self.schema.categories
+            if account_type:
+                sets.append(self.by_type.get(categories["account_type"].codes.get(account_type), set()))
+            if relationship:
+                sets.append(self.by_status.get(categories["relationship_status"].codes.get(relationship), set()))
+
+            term = term.lower()
+            for token in set(WORD_RE.findall(term)):
+                matched = set()
+                for word in self._words_containing(token):
+                    matched |= self.words[word]
+                sets.append(matched)
+
+            if sets:
+                sets.sort(key=len)
+                candidates = set(sets[0]).intersection(*sets[1:])
+            else:
+                candidates = range(self.count)
+
+            if term:
+                keys = (self._rank(rowid, term) for rowid in candidates)
+                keys = [key for key in keys if key]
+            else:
+                keys = [(0, rowid) for rowid in candidates]
+            ranked = heapq.nsmallest(limit, keys) if limit is not None else sorted(keys)
+            return self.schema.to_dicts([self.rows[rowid] for _, rowid in ranked])
+
+ACCOUNT_INDEX = AccountSearchIndex(TABLE_CACHE["accounts"])
+
 @register_widget({
     "name": " Account Lookup",
     "description": "Search and view all involved accounts with dynamic filtering",
@@ -529,39 +1707,170 @@ async def submit_account(params: dict) -> JSONResponse:
 })
 @app.get("/salesforce/accounts/lookup")
 async def lookup_accounts(
+    request: Request,
+    response: Response,
     search_term: str = "",
     account_type_filter: str = "",
-    relationship_filter: str = ""
+    relationship_filter: str = "",
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of accounts to return")
 ):
     """Lookup accounts with dynamic filtering based on params"""
-    if not ACCOUNTS_FILE.exists():
-        return [{"account_name": "No accounts yet", "account_type": None, "primary_contact": None, 
-                 "contact_email": None, "contact_phone": None, "business_focus": None,
-                 "relationship_status": None, "account_notes": None}]
+    cached = await check_tables(request, response, "accounts")
+    if cached:
+        return cached
+    await IO.run(ACCOUNT_INDEX.sync)
+    if ACCOUNT_INDEX.table.signature is None:
+        return [{**SCHEMAS["accounts"].placeholder, "account_name": "No accounts yet"}]
     
-    accounts = []
-    with open(ACCOUNTS_FILE, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        for row in reader:
-            # Apply filters
-            if account_type_filter and row.get('account_type') != account_type_filter:
+    # Filters and search term are answered from the index; matches on the
+    # account name rank first, then contact, business focus and notes.
+    accounts = await IO.run(ACCOUNT_INDEX.search, search_term, account_type_filter, relationship_filter, limit)
+    
+    return accounts if accounts else [{**SCHEMAS["accounts"].placeholder, "account_name": "No matching accounts"}]
+
+# ==================== Bulk Ingest ====================
+BULK_BATCH_ROWS = int(os.environ.get("FORM_WIDGETS_BULK_BATCH_ROWS", "5000"))
+BULK_MAX_ERRORS = 1000
+
+# URL name -> (table, row validator)
+BULK_TABLES = {
+    "deals": ("deals", clean_deal),
+    "tranches": ("tranches", clean_tranche),
+    "realestate": ("assets", clean_asset),
+    "accounts": ("accounts", clean_account),
+}
+
+class NdjsonParser:
+    """Incremental NDJSON parser: body chunks in, (row number, row or error message) out"""
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.number = 0
+
+    def lines(self, data: bytes, final: bool) -> list:
+        self.buffer += self.decoder.decode(data, final)
+        *lines, self.buffer = self.buffer.split("\n")
+        if final and self.buffer:
+            lines.append(self.buffer)
+            self.buffer = ""
+        return lines
+
+    def feed(self, data: bytes, final: bool = False) -> list:
+        parsed = []
+        for line in self.lines(data, final):
+            if not line.strip():
                 continue
-            if relationship_filter and row.get('relationship_status') != relationship_filter:
+            self.number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                parsed.append((self.number, f"Invalid JSON: {e}"))
                 continue
-            
-            # Apply search term across multiple fields
-            if search_term:
-                search_lower = search_term.lower()
-                if not (
-                    search_lower in row.get('account_name', '').lower() or
-                    search_lower in row.get('primary_contact', '').lower() or
-                    search_lower in row.get('business_focus', '').lower() or
-                    search_lower in row.get('account_notes', '').lower()
-                ):
+            parsed.append((self.number, row if isinstance(row, dict) else "Row must be a JSON object"))
+        return parsed
+
+class CsvParser(NdjsonParser):
+    """Incremental CSV parser. The first record is the header; quoted fields may span lines."""
+
+    def __init__(self):
+        super().__init__()
+        self.record = ""
+        self.header = None
+
+    def feed(self, data: bytes, final: bool = False) -> list:
+        parsed = []
+        for line in self.lines(data, final):
+            self.record += line + "\n"
+            if self.record.count('"') % 2:
+                # Still inside a quoted field
+                continue
+            record, self.record = self.record, ""
+            if not record.strip():
+                continue
+            values = next(csv.reader(io.StringIO(record)))
+            if self.header is None:
+                self.header = values
+                continue
+            self.number += 1
+            if len(values) != len(self.header):
+                parsed.append((self.number, f"Expected {len(self.header)} fields, got {len(values)}"))
+                continue
+            parsed.append((self.number, dict(zip(self.header, values))))
+        if final and self.record.strip():
+            parsed.append((self.number + 1, "Unterminated quoted field"))
+        return parsed
+
+@app.post("/salesforce/{endpoint}/bulk")
+async def bulk_ingest(endpoint: str, request: Request):
+    """Bulk-loads rows from a CSV upload (text/csv) or an NDJSON stream (application/x-ndjson).
+
+    Rows are parsed and validated as the body streams in and committed in
+    batches of FORM_WIDGETS_BULK_BATCH_ROWS. The response lists the rows
+    that failed validation and the achieved rows per second.
+    """
+    if endpoint not in BULK_TABLES:
+        return JSONResponse(status_code=404, content={"error": f"Unknown table: {endpoint}"})
+    table, clean = BULK_TABLES[endpoint]
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        parser = CsvParser()
+    elif content_type in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        parser = NdjsonParser()
+    else:
+        return JSONResponse(status_code=415, content={"error": "Send text/csv or application/x-ndjson"})
+
+    started = time.perf_counter()
+    received = 0
+    inserted = 0
+    error_count = 0
+    errors = []
+    batch = []
+
+    def validate(parsed: list):
+        nonlocal received, error_count
+        for number, row in parsed:
+            received += 1
+            if isinstance(row, dict):
+                try:
+                    batch.append(clean(row))
                     continue
-            
-            accounts.append(row)
-    
-    return accounts if accounts else [{"account_name": "No matching accounts", "account_type": None, 
-                                       "primary_contact": None, "contact_email": None, "contact_phone": None,
-                                       "business_focus": None, "relationship_status": None, "account_notes": None}]
+                except ValueError as e:
+                    row = str(e)
+            error_count += 1
+            if len(errors) < BULK_MAX_ERRORS:
+                errors.append({"row": number, "error": row})
+
+    async for chunk in request.stream():
+        validate(await IO.run(parser.feed, chunk))
+        if len(batch) >= BULK_BATCH_ROWS:
+            rows, batch = batch, []
+            await TABLE_WRITERS[table].write(rows)
+            inserted += len(rows)
+    validate(await IO.run(parser.feed, b"", True))
+    if batch:
+        await TABLE_WRITERS[table].write(batch)
+        inserted += len(batch)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "table": endpoint,
+        "received": received,
+        "inserted": inserted,
+        "error_count": error_count,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(inserted / elapsed, 1) if elapsed else None,
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Salesforce widget backend utilities")
+    parser.add_argument("command", choices=["import-csv"], help="import-csv: copy the CSV files into the SQLite database")
+    parser.add_argument("--db", default=str(DB_FILE), help="SQLite database path")
+    args = parser.parse_args()
+
+    if args.command == "import-csv":
+        import_csvs(SqliteStorage(Path(args.db)))
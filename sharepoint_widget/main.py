@@ -1,12 +1,26 @@
 import base64
 import os
-from fastapi import FastAPI, Query, HTTPException, Body
+from fastapi import FastAPI, Query, HTTPException, Body, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from typing import List, Optional, Dict, Union
 import uvicorn
 import json
+import asyncio
+import logging
+import threading
+import time
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+# widget_common.py sits in the repo root, next to this app's folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from widget_common import (IOExecutor, Metrics, MetricsMiddleware, Profiler, ProfilerMiddleware, profile_router,
+                           make_etag, path_version, not_modified, EncodedJSONFile)
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # Configure CORS
 app.add_middleware(
@@ -18,54 +32,324 @@ app.add_middleware(
 )
 
 DUMMY_PDF_DIR = os.path.join(os.path.dirname(__file__), "dummy_pdf")
+WIDGETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "widgets.json")
+APPS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "apps.json")
+
+# --- I/O Executor ---
+
+# Worker pool for disk reads and base64 encoding, so a large PDF never
+# blocks the event loop. Size is set with SHAREPOINT_IO_WORKERS.
+IO = IOExecutor(int(os.environ.get("SHAREPOINT_IO_WORKERS", "4")), thread_name_prefix="sharepoint-io")
+
+# --- Metrics ---
+
+# Size buckets reach 64 MB, since /documents serves whole PDFs.
+METRICS = Metrics(size_buckets=(1024, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864))
+
+app.add_middleware(MetricsMiddleware, metrics=METRICS)
+
+# --- Profiling ---
+
+# Configured by the SHAREPOINT_PROFILE_* variables, see Profiler.
+PROFILER = Profiler("SHAREPOINT", Path(os.path.dirname(__file__)) / "profiles", IO)
+
+if PROFILER.enabled:
+    app.add_middleware(ProfilerMiddleware, profiler=PROFILER)
+
+app.include_router(profile_router(PROFILER))
 
 # --- Helpers ---
 
+class DocumentIndex:
+    """
+    Filename -> path index of the PDF tree, built with os.scandir so a
+    lookup is a dict hit rather than a walk of the whole tree.
+
+    The mtime of every directory is recorded as it is scanned. Adding,
+    removing or renaming an entry changes its directory's mtime, so
+    re-statting the directories (at most once per
+    SHAREPOINT_INDEX_TTL_MS) is enough to know when to rescan. A file
+    rewritten in place keeps its directory's mtime, which is why
+    /documents still stats the file itself for its ETag.
+    """
+
+    def __init__(self, root: str, ttl: float):
+        self.root = os.path.normpath(root)
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.checked = None
+        self.dirs = {}   # directory -> mtime_ns, None if missing
+        self.files = {}  # filename -> path, first match as os.walk would find it
+        self.pdfs = {}   # directory -> PDF filenames directly in it
+
+    @METRICS.timed("document_scan")
+    def _scan(self):
+        dirs, files, pdfs = {}, {}, {}
+
+        def scan(path: str):
+            # Stat before listing: a change in between shows up as a stale mtime
+            try:
+                dirs[path] = os.stat(path).st_mtime_ns
+                entries = list(os.scandir(path))
+            except OSError:
+                dirs[path] = None
+                return
+            subdirs = []
+            names = []
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+                files.setdefault(entry.name, entry.path)
+                if entry.name.lower().endswith('.pdf'):
+                    names.append(entry.name)
+            pdfs[path] = names
+            for subdir in subdirs:
+                scan(subdir)
+
+        scan(self.root)
+        self.dirs, self.files, self.pdfs = dirs, files, pdfs
+
+    def _changed(self) -> bool:
+        for path, mtime in self.dirs.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                if mtime is not None:
+                    return True
+        return False
+
+    def refresh(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.checked is not None and now - self.checked < self.ttl:
+                return
+            if self.checked is None or self._changed():
+                self._scan()
+            self.checked = now
+
+    def folder_path(self, folder: str) -> str:
+        return os.path.normpath(os.path.join(self.root, folder))
+
+    def lookup(self, filename: str) -> Optional[str]:
+        self.refresh()
+        return self.files.get(filename)
+
+    def folders(self) -> List[str]:
+        """Top-level folders of the tree."""
+        self.refresh()
+        return [os.path.basename(path) for path in self.dirs
+                if os.path.dirname(path) == self.root and self.dirs[path] is not None]
+
+    def folder_pdfs(self, folder: str) -> List[str]:
+        self.refresh()
+        return self.pdfs.get(self.folder_path(folder), [])
+
+    def version(self, *folders: str):
+        """
+        (etag, newest mtime) of the given folders as of the last scan, so
+        the tag always matches the listing the index serves.
+        """
+        self.refresh()
+        stats = [(folder, self.dirs.get(self.folder_path(folder))) for folder in folders]
+        mtimes = [mtime / 1e9 for _, mtime in stats if mtime is not None]
+        return make_etag(stats), max(mtimes) if mtimes else None
+
+DOCUMENT_INDEX = DocumentIndex(DUMMY_PDF_DIR, float(os.environ.get("SHAREPOINT_INDEX_TTL_MS", "1000")) / 1000)
+
+def list_folders() -> List[str]:
+    return DOCUMENT_INDEX.folders()
+
+def list_pdfs(folder_names: List[str]) -> List[str]:
+    all_files = []
+    for folder_name in folder_names:
+        all_files.extend(DOCUMENT_INDEX.folder_pdfs(folder_name))
+    return all_files
+
+@METRICS.timed("find_pdf")
+def find_pdf(filename: str) -> Optional[str]:
+    """
+    Returns the path of filename anywhere under dummy_pdf.
+    """
+    target_path = DOCUMENT_INDEX.lookup(filename)
+    if target_path:
+        return target_path
+    logger.debug("find_pdf: %s not found under %s", filename, DUMMY_PDF_DIR)
+    return None
+
+@METRICS.timed("base64_encode")
+def encode_pdf(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return base64.b64encode(f.read()).decode('utf-8')
+    except Exception as e:
+        logger.warning("Error reading %s: %s", path, e)
+        return None
+
+# Raw bytes per streamed piece; a multiple of 3 so every piece encodes without padding
+BASE64_CHUNK = 3 * 64 * 1024
+
+def read_base64_chunk(f) -> bytes:
+    return base64.b64encode(f.read(BASE64_CHUNK))
+
+async def stream_base64_pdf(filename: str, f):
+    """
+    The /documents JSON object for the open binary file f, with the
+    content base64-encoded one chunk at a time as it is sent. Memory use
+    is a couple of chunks however large the file is. Closes f when done.
+    Callers open the file themselves, as a StreamingResponse has already
+    sent its 200 by the time the first chunk is pulled.
+    """
+    try:
+        envelope = json.dumps({"data_format": {"data_type": "pdf", "filename": filename}, "content": ""})
+        # Everything up to the content's closing quote
+        yield envelope[:-2].encode("utf-8")
+        while True:
+            chunk = await IO.run(read_base64_chunk, f)
+            if not chunk:
+                break
+            yield chunk
+        yield b'"}'
+    finally:
+        await IO.run(f.close)
+
 def get_base64_pdf(filename: str) -> Optional[str]:
     """
     Recursively searches for filename in dummy_pdf and returns base64 content.
     """
-    target_path = None
-    # 1. Check root
-    root_path = os.path.join(DUMMY_PDF_DIR, filename)
-    if os.path.exists(root_path):
-        target_path = root_path
-    else:
-        # 2. Search subdirectories
-        if os.path.exists(DUMMY_PDF_DIR):
-            for root, dirs, files in os.walk(DUMMY_PDF_DIR):
-                if filename in files:
-                    target_path = os.path.join(root, filename)
-                    break
-    
-    if target_path and os.path.exists(target_path):
+    target_path = find_pdf(filename)
+    return encode_pdf(target_path) if target_path else None
+
+def split_values(items: List[str]) -> List[str]:
+    """
+    Flattens query values that may arrive comma-separated, keeping the
+    first occurrence of each.
+    """
+    values = []
+    for item in items:
+        values.extend(x.strip() for x in item.split(",") if x.strip())
+    return list(dict.fromkeys(values))
+
+# --- Document Cache ---
+
+class DocumentCache:
+    """
+    LRU of base64-encoded documents, bounded by the total size of the
+    encoded text (SHAREPOINT_DOCUMENT_CACHE_MB). Entries are keyed by
+    path, mtime and size, so a changed file is simply a new key; the
+    entry for its old version is dropped when the new one is stored.
+
+    Concurrent requests for a file that is not cached share a single
+    read and encode. Only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.entries = OrderedDict()  # (path, mtime_ns, size) -> encoded content
+        self.keys = {}                # path -> its cached key
+        self.loading = {}             # (path, mtime_ns, size) -> task encoding it
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get(self, path: str) -> Optional[str]:
         try:
-            with open(target_path, "rb") as f:
-                return base64.b64encode(f.read()).decode('utf-8')
-        except Exception as e:
-            print(f"Error reading {filename}: {e}")
+            st = await IO.run(os.stat, path)
+        except OSError:
             return None
-    
-    print(f"DEBUG: get_base64_pdf failed to find {filename} in {DUMMY_PDF_DIR}")
-    return None
+        key = (path, st.st_mtime_ns, st.st_size)
+        content = self.entries.get(key)
+        if content is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return content
+        task = self.loading.get(key)
+        if task is None:
+            self.misses += 1
+            # A task of its own, so a client that disconnects does not cancel it for the others
+            task = self.loading[key] = asyncio.ensure_future(self._load(key))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: tuple) -> Optional[str]:
+        try:
+            content = await IO.run(encode_pdf, key[0])
+        finally:
+            del self.loading[key]
+        if content is not None:
+            self._store(key, content)
+        return content
+
+    def _store(self, key: tuple, content: str):
+        if len(content) > self.budget:
+            return
+        old = self.keys.get(key[0])
+        if old is not None and old in self.entries:
+            self.bytes -= len(self.entries.pop(old))
+        self.entries[key] = content
+        self.keys[key[0]] = key
+        self.bytes += len(content)
+        while self.bytes > self.budget:
+            evicted, content = self.entries.popitem(last=False)
+            del self.keys[evicted[0]]
+            self.bytes -= len(content)
+            self.evictions += 1
+
+    def render(self) -> str:
+        lines = []
+        for name, kind, value, help in (
+            ("document_cache_hits_total", "counter", self.hits, "Documents served from the cache"),
+            ("document_cache_misses_total", "counter", self.misses, "Documents read and encoded"),
+            ("document_cache_coalesced_total", "counter", self.coalesced, "Requests that waited on another request's encode"),
+            ("document_cache_evictions_total", "counter", self.evictions, "Documents evicted to stay within the budget"),
+            ("document_cache_entries", "gauge", len(self.entries), "Documents in the cache"),
+            ("document_cache_bytes", "gauge", self.bytes, "Size of the cached encoded documents"),
+            ("document_cache_budget_bytes", "gauge", self.budget, "Configured cache size"),
+        ):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+DOCUMENT_CACHE = DocumentCache(int(float(os.environ.get("SHAREPOINT_DOCUMENT_CACHE_MB", "64")) * 1024 * 1024))
+# /documents streams files of at least this size instead of encoding them in memory
+DOCUMENT_STREAM_BYTES = int(float(os.environ.get("SHAREPOINT_DOCUMENT_STREAM_MB", "8")) * 1024 * 1024)
+
+# --- Pre-encoded Responses ---
+
+WIDGETS_PAYLOAD = EncodedJSONFile(WIDGETS_FILE)
+APPS_PAYLOAD = EncodedJSONFile(APPS_FILE)
 
 # --- Endpoints ---
 
+@app.get("/io/stats")
+async def get_io_stats():
+    """Queue depth of the document I/O pool."""
+    return IO.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request and internal-operation metrics in Prometheus text format."""
+    return PlainTextResponse(METRICS.render() + DOCUMENT_CACHE.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/widgets.json")
-def get_widgets_config():
+async def get_widgets_config(request: Request, response: Response):
     try:
-        with open("widgets.json", "r") as f:
-            return json.load(f)
+        payload = await IO.run(WIDGETS_PAYLOAD.get)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return payload.respond(request, response)
 
 @app.get("/apps.json")
-def get_apps_config():
+async def get_apps_config(request: Request, response: Response):
     try:
-        with open("apps.json", "r") as f:
-            return json.load(f)
+        payload = await IO.run(APPS_PAYLOAD.get)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return payload.respond(request, response)
 
 @app.get("/deals")
 def get_deals():
@@ -78,48 +362,39 @@ def get_deals():
     ]
 
 @app.get("/folders")
-def get_folders(deal_id: str = "deal_alpha"):
+async def get_folders(request: Request, response: Response, deal_id: str = "deal_alpha"):
     """
     Returns list of subdirectories in dummy_pdf.
     Ignores deal_id argument in this mock implementation, 
     serving the same physical folders for all deals.
     """
-    if not os.path.exists(DUMMY_PDF_DIR):
-        return []
-        
+    cached = not_modified(request, response, *await IO.run(DOCUMENT_INDEX.version, "."))
+    if cached:
+        return cached
+
     folders = []
-    for d in os.listdir(DUMMY_PDF_DIR):
-        if os.path.isdir(os.path.join(DUMMY_PDF_DIR, d)):
-            folders.append({"label": d, "value": d})
+    for d in await IO.run(list_folders):
+        folders.append({"label": d, "value": d})
             
     return folders
 
 @app.get("/files_list")
-def get_files_list(deal_id: str = "deal_alpha", folder_ids: Optional[List[str]] = Query(None)):
+async def get_files_list(request: Request, response: Response, deal_id: str = "deal_alpha", folder_ids: Optional[List[str]] = Query(None)):
     """
     Returns list of filenames in the selected folders.
     """
     if not folder_ids:
         return []
         
-    all_files = []
+    # normalize list input that might contain csv strings
+    actual_folder_ids = split_values(folder_ids)
     
-    # helper to normalize list input that might contain csv strings
-    actual_folder_ids = []
-    for item in folder_ids:
-        if "," in item:
-            actual_folder_ids.extend([x.strip() for x in item.split(",")])
-        else:
-            actual_folder_ids.append(item)
-    
-    for folder_name in actual_folder_ids:
-        folder_path = os.path.join(DUMMY_PDF_DIR, folder_name)
-        if os.path.exists(folder_path):
-            files = [
-                f for f in os.listdir(folder_path) 
-                if f.lower().endswith('.pdf')
-            ]
-            all_files.extend(files)
+    # A folder's mtime changes whenever a file is added, removed or renamed in it
+    cached = not_modified(request, response, *await IO.run(DOCUMENT_INDEX.version, *actual_folder_ids))
+    if cached:
+        return cached
+
+    all_files = await IO.run(list_pdfs, actual_folder_ids)
             
     # Deduplicate and sort
     unique_files = sorted(list(set(all_files)))
@@ -128,14 +403,31 @@ def get_files_list(deal_id: str = "deal_alpha", folder_ids: Optional[List[str]]
 from fastapi import Request
 
 @app.get("/documents")
-def get_documents(filename: str = Query(..., description="Filename to fetch")):
+async def get_documents(request: Request, response: Response, filename: str = Query(..., description="Filename to fetch")):
     """
     Returns base64 encoded content for a SINGLE file.
     Matches congress-main reference implementation.
     """
-    print(f"DEBUG: GET /documents called for filename: {filename}")
-    
-    b64_content = get_base64_pdf(filename)
+    target_path = await IO.run(find_pdf, filename)
+    if not target_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+
+    cached = not_modified(request, response, *await IO.run(path_version, target_path))
+    if cached:
+        return cached
+
+    # Large files are streamed rather than encoded whole, and never cached.
+    # The file is opened here so that a missing file is still a 404.
+    try:
+        large = (await IO.run(os.path.getsize, target_path)) >= DOCUMENT_STREAM_BYTES
+        f = await IO.run(open, target_path, "rb") if large else None
+    except OSError:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+    if f is not None:
+        return StreamingResponse(stream_base64_pdf(filename, f), media_type="application/json",
+                                 headers=dict(response.headers))
+
+    b64_content = await DOCUMENT_CACHE.get(target_path)
     if not b64_content:
         raise HTTPException(status_code=404, detail=f"File not found: {filename}")
         
@@ -147,5 +439,83 @@ def get_documents(filename: str = Query(..., description="Filename to fetch")):
         "content": b64_content
     }
 
+async def load_document(filename: str):
+    """
+    One entry of a batch: the document as /documents returns it, or an
+    error for a file that cannot be found or read. A file large enough
+    to be streamed is not loaded or opened; it comes back as (error to
+    send if it cannot be opened, its path).
+    """
+    document = {"data_format": {"data_type": "pdf", "filename": filename}}
+    missing = {**document, "error": f"File not found: {filename}"}
+    target_path = await IO.run(find_pdf, filename)
+    if not target_path:
+        return missing
+    try:
+        if (await IO.run(os.path.getsize, target_path)) >= DOCUMENT_STREAM_BYTES:
+            return missing, target_path
+    except OSError:
+        return missing
+    content = await DOCUMENT_CACHE.get(target_path)
+    if not content:
+        return missing
+    return {**document, "content": content}
+
+@app.get("/documents/batch")
+async def get_documents_batch(filename: List[str] = Query(..., description="Filenames to fetch")):
+    """
+    Returns several files at once as NDJSON, one /documents object per
+    line. All files are loaded concurrently on the I/O pool and each is
+    written as soon as it is ready, so the batch takes about as long as
+    its slowest file. Lines arrive in completion order, not request order.
+    Large files go through the chunked encoder as on /documents, while
+    the other files keep loading.
+    """
+    filenames = split_values(filename)
+
+    async def body():
+        tasks = [asyncio.ensure_future(load_document(f)) for f in filenames]
+        try:
+            for done in asyncio.as_completed(tasks):
+                document = await done
+                if isinstance(document, dict):
+                    yield (json.dumps(document) + "\n").encode("utf-8")
+                    continue
+                missing, path = document
+                # Opened only when its turn comes, so at most one large
+                # file is open at a time
+                try:
+                    f = await IO.run(open, path, "rb")
+                except OSError:
+                    yield (json.dumps(missing) + "\n").encode("utf-8")
+                    continue
+                async for part in stream_base64_pdf(missing["data_format"]["filename"], f):
+                    yield part
+                yield b"\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+@app.get("/documents/raw")
+async def get_document_raw(request: Request, response: Response, filename: str = Query(..., description="Filename to fetch")):
+    """
+    Returns the PDF itself rather than base64 in JSON, for viewers that
+    can take it. The file is streamed from disk (or handed to the server
+    to send) and Range requests are honoured, so a viewer can fetch the
+    pages it shows first.
+    """
+    target_path = await IO.run(find_pdf, filename)
+    if not target_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {filename}")
+
+    cached = not_modified(request, response, *await IO.run(path_version, target_path))
+    if cached:
+        return cached
+
+    return FileResponse(target_path, media_type="application/pdf", headers=dict(response.headers),
+                        filename=os.path.basename(target_path), content_disposition_type="inline")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8003, reload=True)
@@ -1,3 +1,3 @@
 @echo off
-pip install fastapi uvicorn
+pip install fastapi uvicorn brotli
 python -m uvicorn main:app --reload --port 8003
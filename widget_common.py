@@ -0,0 +1,554 @@
+"""Serving infrastructure shared by form_widgets and sharepoint_widget: the
+I/O thread pool, Prometheus metrics, per-request profiling and conditional,
+pre-compressed JSON responses.
+
+Each app builds its own instances from its own environment variables; only
+the classes and helpers live here.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from starlette.routing import Match
+from typing import Optional
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from collections import Counter
+from functools import wraps
+import asyncio
+import bisect
+import contextvars
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+try:
+    import brotli
+except ImportError:  # listed in requirements; without it responses fall back to gzip
+    brotli = None
+
+# ==================== I/O Executor ====================
+PROFILE = contextvars.ContextVar("profile", default=None)
+
+class IOExecutor:
+    """Bounded thread pool that runs blocking file reads, writes and encoding
+    off the event loop.
+
+    stats() reports how many calls are running and how many are waiting for
+    a worker.
+    """
+
+    def __init__(self, workers: int, thread_name_prefix: str = "widget-io"):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.active = 0
+
+    def _call(self, func, args):
+        with self.lock:
+            self.active += 1
+        try:
+            return func(*args)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _done(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    async def run(self, func, *args):
+        profile = PROFILE.get()
+        if profile is not None and profile.active:
+            func, args = profile.track, (func,) + args
+        with self.lock:
+            self.pending += 1
+        future = self.pool.submit(self._call, func, args)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"workers": self.workers, "active": self.active, "queued": self.pending - self.active}
+
+# ==================== Metrics ====================
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        sep = "," if labels else ""
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+def label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metrics:
+    """Request and internal-operation metrics, rendered in Prometheus text format.
+
+    Requests are labelled by route template rather than raw path, so label
+    cardinality stays bounded. Every update is a dict lookup and a few
+    additions under one lock. size_buckets bounds the response size
+    histograms, so an app serving large files can widen them.
+    """
+
+    def __init__(self, size_buckets: tuple = SIZE_BUCKETS):
+        self.size_buckets = size_buckets
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.requests = {}
+        self.durations = {}
+        self.sizes = {}
+        self.operations = {}
+
+    def start(self, key: tuple):
+        with self.lock:
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finish(self, key: tuple, status: int, seconds: float, size: int):
+        with self.lock:
+            self.in_flight[key] -= 1
+            counter = key + (status,)
+            self.requests[counter] = self.requests.get(counter, 0) + 1
+            if key not in self.durations:
+                self.durations[key] = Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = Histogram(self.size_buckets)
+            self.durations[key].observe(seconds)
+            self.sizes[key].observe(size)
+
+    def observe(self, operation: str, seconds: float):
+        with self.lock:
+            if operation not in self.operations:
+                self.operations[operation] = Histogram(LATENCY_BUCKETS)
+            self.operations[operation].observe(seconds)
+
+    def timed(self, operation: str):
+        """Decorator recording the wrapped function's run time under operation"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(operation, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def render(self) -> str:
+        route_labels = lambda key: f'method="{label_value(key[0])}",route="{label_value(key[1])}"'
+        lines = []
+        with self.lock:
+            lines += ["# HELP http_requests_in_flight Requests currently being served",
+                      "# TYPE http_requests_in_flight gauge"]
+            lines += [f"http_requests_in_flight{{{route_labels(key)}}} {n}" for key, n in sorted(self.in_flight.items())]
+            lines += ["# HELP http_requests_total Completed requests by status code",
+                      "# TYPE http_requests_total counter"]
+            lines += [f'http_requests_total{{{route_labels(key)},status="{key[2]}"}} {n}'
+                      for key, n in sorted(self.requests.items())]
+            lines += ["# HELP http_request_duration_seconds Time to serve a request, including streamed bodies",
+                      "# TYPE http_request_duration_seconds histogram"]
+            for key, histogram in sorted(self.durations.items()):
+                lines += histogram.render("http_request_duration_seconds", route_labels(key))
+            lines += ["# HELP http_response_size_bytes Response body size",
+                      "# TYPE http_response_size_bytes histogram"]
+            for key, histogram in sorted(self.sizes.items()):
+                lines += histogram.render("http_response_size_bytes", route_labels(key))
+            lines += ["# HELP operation_duration_seconds Time spent in internal operations",
+                      "# TYPE operation_duration_seconds histogram"]
+            for operation, histogram in sorted(self.operations.items()):
+                lines += histogram.render("operation_duration_seconds", f'operation="{label_value(operation)}"')
+        return "\n".join(lines) + "\n"
+
+ROUTE_CACHE = {}
+
+def match_template(routes, scope) -> str:
+    for candidate in routes:
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            included = getattr(candidate, "original_router", None)
+            if included is not None:
+                # Newer FastAPI keeps an included router as a single route
+                return match_template(included.routes, scope)
+            return getattr(candidate, "path", "unmatched")
+    return "unmatched"
+
+def route_template(scope) -> str:
+    """Path template of the route that serves scope, e.g. /salesforce/{endpoint}/bulk"""
+    key = (scope["method"], scope["path"])
+    route = ROUTE_CACHE.get(key)
+    if route is None:
+        route = match_template(scope["app"].router.routes, scope)
+        if route != "unmatched" and len(ROUTE_CACHE) < 1024:
+            ROUTE_CACHE[key] = route
+    return route
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request against its route template"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        key = (scope["method"], route_template(scope))
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.start(key)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.finish(key, response["status"], time.perf_counter() - started, response["size"])
+
+# ==================== Profiling ====================
+class Profiler:
+    """Profiling settings read from <prefix>_PROFILE_* environment variables.
+
+    Off unless a token or routes are configured; when off the apps install
+    no middleware and IO.run pays a single context-variable lookup. The
+    token gates both on-demand profiling (an X-Profile-Token header) and
+    the routes of profile_router(); with routes alone, profiles are only
+    written to dir.
+    """
+
+    def __init__(self, prefix: str, default_dir: Path, io: IOExecutor):
+        self.token = os.environ.get(f"{prefix}_PROFILE_TOKEN", "")
+        self.routes = {r.strip() for r in os.environ.get(f"{prefix}_PROFILE_ROUTES", "").split(",") if r.strip()}
+        self.dir = Path(os.environ.get(f"{prefix}_PROFILE_DIR", default_dir))
+        self.interval = float(os.environ.get(f"{prefix}_PROFILE_INTERVAL_MS", "1")) / 1000
+        self.keep = int(os.environ.get(f"{prefix}_PROFILE_KEEP", "50"))
+        self.io = io
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token or self.routes)
+
+    def token_ok(self, token: Optional[str]) -> bool:
+        return bool(self.token) and token is not None and secrets.compare_digest(token, self.token)
+
+    def saved(self) -> list:
+        """Stored profiles, newest first"""
+        if not self.dir.exists():
+            return []
+        saved = [(p, p.stat()) for p in self.dir.glob("*.folded")]
+        saved.sort(key=lambda item: item[1].st_mtime, reverse=True)
+        return [{"id": p.stem, "bytes": st.st_size, "created": formatdate(st.st_mtime, usegmt=True)}
+                for p, st in saved]
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        """File holding profile_id, or None if there is no such profile"""
+        path = self.dir / f"{profile_id}.folded"
+        if "/" in profile_id or "\\" in profile_id or not path.is_file():
+            return None
+        return path
+
+class RequestProfile:
+    """Sampling profile of one request.
+
+    A sampler thread records the stacks of the event loop thread and of any
+    I/O pool thread currently running work for this request, and saves
+    them in folded-stack format (one "frame;frame;frame count" line per
+    stack), which flamegraph.pl and speedscope read directly. The loop
+    thread is shared, so samples taken there while another request runs
+    show up too.
+    """
+
+    def __init__(self, profile_id: str, interval: float):
+        self.id = profile_id
+        self.interval = interval
+        self.active = True
+        self.lock = threading.Lock()
+        self.threads = {threading.get_ident(): 1}
+        self.stacks = Counter()
+        self.sampler = threading.Thread(target=self._sample, name=f"profile-{profile_id}", daemon=True)
+        self.sampler.start()
+
+    def track(self, func, *args):
+        """Runs func on the calling pool thread, sampling it meanwhile"""
+        ident = threading.get_ident()
+        with self.lock:
+            self.threads[ident] = self.threads.get(ident, 0) + 1
+        try:
+            return func(*args)
+        finally:
+            with self.lock:
+                self.threads[ident] -= 1
+                if not self.threads[ident]:
+                    del self.threads[ident]
+
+    def _sample(self):
+        while self.active:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                idents = list(self.threads)
+            for ident in idents:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.active = False
+        self.sampler.join()
+
+    def save(self, directory: Path, keep: int):
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / f"{self.id}.folded", "w", encoding="utf-8") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+        saved = sorted(directory.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for old in saved[:-keep]:
+            old.unlink(missing_ok=True)
+
+class ProfilerMiddleware:
+    """Profiles requests to the profiler's routes, or carrying its
+    X-Profile-Token, and tells the client the profile's id in an
+    X-Profile-Id header"""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+        self.counter = itertools.count(1)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = route_template(scope)
+        token = dict(scope["headers"]).get(b"x-profile-token")
+        if route not in self.profiler.routes and not self.profiler.token_ok(token.decode("latin-1") if token else None):
+            return await self.app(scope, receive, send)
+
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self.counter)}-{scope['method']}-{slug}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profile = RequestProfile(profile_id, self.profiler.interval)
+        reset = PROFILE.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            PROFILE.reset(reset)
+            await asyncio.to_thread(profile.stop)
+            await self.profiler.io.run(profile.save, self.profiler.dir, self.profiler.keep)
+
+def profile_router(profiler: Profiler) -> APIRouter:
+    """/admin/profiles routes listing and downloading saved profiles.
+
+    Both require the profiler's X-Profile-Token. Without a configured
+    token the router is empty, so the routes do not exist at all.
+    """
+    router = APIRouter()
+    if not profiler.token:
+        return router
+
+    def check_profile_token(request: Request):
+        if not profiler.token_ok(request.headers.get("x-profile-token")):
+            raise HTTPException(status_code=403, detail="Missing or wrong X-Profile-Token")
+
+    @router.get("/admin/profiles", dependencies=[Depends(check_profile_token)])
+    async def list_profiles():
+        """Stored request profiles, newest first"""
+        return await profiler.io.run(profiler.saved)
+
+    @router.get("/admin/profiles/{profile_id}", dependencies=[Depends(check_profile_token)])
+    async def download_profile(profile_id: str):
+        """One profile as folded stacks"""
+        path = profiler.path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+        return FileResponse(path, media_type="text/plain; charset=utf-8", filename=path.name)
+
+    return router
+
+# ==================== Conditional GET ====================
+def make_etag(*parts) -> str:
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest() + '"'
+
+def file_version(path):
+    """(etag, mtime) from a file's stat data, or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return make_etag(str(path), st.st_mtime_ns, st.st_size), st.st_mtime
+
+def path_version(*paths: str):
+    """(etag, newest mtime) from the stat data of the given files or folders.
+    Missing paths are part of the tag too."""
+    stats = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stats.append((path, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stats.append((path, None, None))
+    mtimes = [mtime / 1e9 for _, mtime, _ in stats if mtime is not None]
+    return make_etag(stats), max(mtimes) if mtimes else None
+
+def coding_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of one content-coding of the representation tagged etag, e.g. "<hash>-gzip" """
+    return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def settled_mtime(last_modified: Optional[float]) -> Optional[float]:
+    """last_modified if it is at least a second old, else None.
+
+    HTTP dates have one-second precision, so a resource changed again
+    within the same second would keep its Last-Modified and a client
+    revalidating by date would get a stale 304. Until the second has
+    passed only the ETag is sent.
+    """
+    if last_modified is None or time.time() - last_modified < 1:
+        return None
+    return last_modified
+
+def not_modified(request: Request, response: Response, etag: str, last_modified: Optional[float] = None) -> Optional[Response]:
+    """Sets the validators on response and returns a 304 if the client's copy is current"""
+    last_modified = settled_mtime(last_modified)
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        if int(last_modified) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
+
+# ==================== Pre-encoded Responses ====================
+class EncodedJSON:
+    """A JSON document serialized once, plus gzip and brotli variants,
+    served by Accept-Encoding.
+
+    Variants that do not come out smaller than the plain body are dropped.
+    Each variant has its own strong ETag, etag with the coding appended,
+    since the bytes differ; etag itself tags the document's version.
+    """
+
+    def __init__(self, document, etag: str, last_modified: Optional[float] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+        body = json.dumps(document, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        self.bodies = {"identity": body}
+        variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+        for encoding, encoded in variants.items():
+            if len(encoded) < len(body):
+                self.bodies[encoding] = encoded
+        self.etags = {encoding: coding_etag(etag, encoding) for encoding in self.bodies}
+
+    def pick_encoding(self, accept_encoding: str) -> str:
+        """Best available encoding by q-value, ties going to the smallest body"""
+        accepted = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            q = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            if name:
+                accepted[name.strip().lower()] = q
+        best, best_key = "identity", (accepted.get("identity", 0.001), -len(self.bodies["identity"]))
+        for encoding, body in self.bodies.items():
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if encoding != "identity" and q > 0 and (q, -len(body)) > best_key:
+                best, best_key = encoding, (q, -len(body))
+        return best
+
+    def respond(self, request: Request, response: Response) -> Response:
+        encoding = self.pick_encoding(request.headers.get("accept-encoding", ""))
+        # The client's copy is current only if it holds the coding we would send
+        cached = not_modified(request, response, self.etags[encoding], self.last_modified)
+        if cached:
+            cached.headers["Vary"] = "Accept-Encoding"
+            return cached
+        headers = {"ETag": self.etags[encoding], "Vary": "Accept-Encoding"}
+        last_modified = settled_mtime(self.last_modified)
+        if last_modified is not None:
+            headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.bodies[encoding], media_type="application/json", headers=headers)
+
+class EncodedJSONFile:
+    """EncodedJSON of a JSON file, rebuilt only when the file's stat data changes"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.payload = None
+
+    def get(self) -> EncodedJSON:
+        version = file_version(self.path)
+        if version is None:
+            raise FileNotFoundError(self.path)
+        with self.lock:
+            if self.payload is None or self.payload.etag != version[0]:
+                with self.path.open(encoding="utf-8") as file:
+                    self.payload = EncodedJSON(json.load(file), *version)
+            return self.payload